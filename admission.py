@@ -0,0 +1,245 @@
+"""Admission control for operations that change or load the Ollama server
+
+Every mutating route goes through two checks:
+- a token bucket per client and operation class, answering 429 when a
+  client sends more than its share (e.g. a script firing pulls in a loop)
+- a concurrency gate per Ollama server, so only a few mutating calls run
+  against it at once. Callers queue for a free slot for a short while and
+  get a 503 when the queue is full or the wait runs out.
+
+Both answers carry Retry-After. Tokens are given back when a call is
+turned away by the gate or fails validation (4xx), so only work that
+reached the route is charged. Read-only routes never pass through here,
+so the dashboard keeps working while bulk operations are throttled, and
+bulk operations (pulls) may never take the slots reserved for short ones.
+"""
+import math
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlsplit
+from flask import current_app, jsonify, request
+import metrics
+from translations import gettext
+
+# Operation class: (tokens per second, burst size, bulk)
+DEFAULT_LIMITS = {
+    'pull': (1 / 30, 3, True),
+    'delete': (1, 10, False),
+    'stop': (1, 10, False),
+    'config': (1, 20, False),
+}
+UPSTREAM_CONCURRENCY = 4  # mutating calls running against one Ollama server
+BULK_CONCURRENCY = 2      # of which bulk operations may use at most this many
+MAX_QUEUE = 16            # callers waiting for a slot on one server
+QUEUE_TIMEOUT = 10        # seconds a caller waits for a slot
+MAX_CLIENTS = 10000       # buckets kept before idle ones are dropped
+MAX_UPSTREAMS = 64        # gates kept before idle ones are dropped
+
+LOOPBACK_HOSTS = ('localhost', '::1')
+
+
+def normalize_upstream(url):
+    """Reduce a server URL to scheme://host:port so one server gets one gate"""
+    parts = urlsplit(url if '//' in url else f'http://{url}')
+    scheme = (parts.scheme or 'http').lower()
+    host = parts.hostname or ''
+    if host in LOOPBACK_HOSTS or host.startswith('127.'):
+        host = '127.0.0.1'
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    return f"{scheme}://{host}:{port or (443 if scheme == 'https' else 80)}"
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost=1):
+        """Take cost tokens; returns 0 on success, else the seconds until they are available
+
+        cost must not exceed the capacity, or the bucket can never serve it.
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0
+        return (cost - self.tokens) / self.rate
+
+    def refund(self, cost=1):
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+    def is_full(self):
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class UpstreamGate:
+    """Bounded concurrency for one Ollama server, with a bounded wait queue
+
+    Short operations are served before bulk ones when a slot frees up, and
+    bulk operations can hold at most bulk_limit of the slots.
+    """
+
+    def __init__(self, limit=UPSTREAM_CONCURRENCY, bulk_limit=BULK_CONCURRENCY, max_queue=MAX_QUEUE):
+        self.limit = limit
+        self.bulk_limit = bulk_limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.active_bulk = 0
+        self.users = 0  # requests holding this gate, managed by AdmissionControl
+        self.waiting = 0
+        self.waiting_short = 0
+        self._cond = threading.Condition()
+
+    def _can_enter(self, bulk):
+        if self.active >= self.limit:
+            return False
+        if bulk:
+            return self.active_bulk < self.bulk_limit and not self.waiting_short
+        return True
+
+    def acquire(self, bulk, timeout=QUEUE_TIMEOUT):
+        """Wait for a slot; returns False when the queue is full or the wait timed out"""
+        with self._cond:
+            if not self._can_enter(bulk):
+                if self.waiting >= self.max_queue:
+                    return False
+                self.waiting += 1
+                if not bulk:
+                    self.waiting_short += 1
+                metrics.ADMISSION_QUEUED.inc()
+                try:
+                    if not self._cond.wait_for(lambda: self._can_enter(bulk), timeout):
+                        return False
+                finally:
+                    self.waiting -= 1
+                    if not bulk:
+                        self.waiting_short -= 1
+                    metrics.ADMISSION_QUEUED.dec()
+            self.active += 1
+            if bulk:
+                self.active_bulk += 1
+            return True
+
+    def release(self, bulk):
+        with self._cond:
+            self.active -= 1
+            if bulk:
+                self.active_bulk -= 1
+            self._cond.notify_all()
+
+
+class AdmissionControl:
+    """Decorate routes with limit('<operation class>') to admit or reject calls
+
+    upstream is a callable returning the Ollama server the current request
+    talks to; each server gets its own gate.
+    """
+
+    def __init__(self, upstream, limits=None):
+        self.upstream = upstream
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self._buckets = {}
+        self._gates = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, client, operation):
+        key = (client, operation)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_CLIENTS:
+                # Full buckets carry no state worth keeping
+                self._buckets = {k: b for k, b in self._buckets.items() if not b.is_full()}
+            rate, capacity, _bulk = self.limits[operation]
+            bucket = self._buckets[key] = TokenBucket(rate, capacity)
+        return bucket
+
+    def _gate(self, upstream):
+        """Get the gate of a server, or None when too many servers are busy"""
+        key = normalize_upstream(upstream)
+        gate = self._gates.get(key)
+        if gate is None:
+            if len(self._gates) >= MAX_UPSTREAMS:
+                self._gates = {k: g for k, g in self._gates.items() if g.users}
+                if len(self._gates) >= MAX_UPSTREAMS:
+                    return None
+            gate = self._gates[key] = UpstreamGate()
+        gate.users += 1
+        return gate
+
+    def _release_gate(self, gate):
+        with self._lock:
+            gate.users -= 1
+
+    def _reject(self, operation, reason, status, retry_after, message):
+        metrics.ADMISSION_REJECTED.inc(operation, reason)
+        response = jsonify({'error': message, 'status': reason})
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, status
+
+    def limit(self, operation, cost=None):
+        """Admit the decorated route under an operation class
+
+        cost, if given, is called with no arguments inside the request and
+        returns how many tokens the call uses (e.g. the size of a batch).
+        Calls costing more than the burst size are answered with 413.
+        """
+        _rate, capacity, bulk = self.limits[operation]
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if not current_app.config.get('ADMISSION_CONTROL', True):
+                    return f(*args, **kwargs)
+
+                tokens = cost() if cost else 1
+                if tokens > capacity:
+                    # Would never fit in the bucket; charging less would let it through cheaply
+                    metrics.ADMISSION_REJECTED.inc(operation, 'too_large')
+                    return jsonify({
+                        'error': gettext("Too many models in one request, the limit is %(limit)d", limit=capacity),
+                        'status': 'too_large'
+                    }), 413
+
+                client = request.remote_addr or 'unknown'
+                with self._lock:
+                    bucket = self._bucket(client, operation)
+                    wait = bucket.take(tokens)
+                    gate = None if wait else self._gate(self.upstream())
+                if wait:
+                    return self._reject(operation, 'rate_limited', 429, wait,
+                                        gettext("Too many requests, retry in %(seconds)d s", seconds=math.ceil(wait)))
+
+                try:
+                    if gate is None or not gate.acquire(bulk):
+                        with self._lock:
+                            bucket.refund(tokens)
+                        return self._reject(operation, 'server_busy', 503, QUEUE_TIMEOUT,
+                                            gettext("The Ollama server is busy, retry shortly"))
+                    try:
+                        response = current_app.make_response(f(*args, **kwargs))
+                    finally:
+                        gate.release(bulk)
+                finally:
+                    if gate is not None:
+                        self._release_gate(gate)
+
+                if 400 <= response.status_code < 500:
+                    # Rejected by the route's own validation: nothing reached Ollama
+                    with self._lock:
+                        bucket.refund(tokens)
+                return response
+            return decorated_function
+        return decorator
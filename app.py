@@ -1,56 +1,90 @@
 import requests
-from flask import g, Flask, render_template, jsonify, request, session, redirect, url_for
-from flask_babel import Babel, refresh, gettext, ngettext, lazy_gettext
+from flask import g, Blueprint, Flask, Response, current_app, render_template, jsonify, request, session, redirect, url_for
+from flask_babel import Babel, refresh
 from flask_babel_js import BabelJS
+from werkzeug.local import LocalProxy
 from ollama_client import OllamaClient
+from assets import StaticAssets, PageCache
+from admission import AdmissionControl
+import metrics
 import traceback
+import time
 import os
 import json
-from translations import t, get_translation, set_language, get_available_languages, DEFAULT_LANGUAGE
-from bs4 import BeautifulSoup
+from datetime import datetime, timezone
+from translations import t, gettext, ngettext, get_locale, get_translation, set_language, get_available_languages, DEFAULT_LANGUAGE
 from functools import wraps
 
-def get_locale():
-    # try to guess the language from the user accept header the browser transmits
-    default_lang = request.accept_languages.best_match(['fr', 'en'])
-    if request.args.get('language'):
-        session['language'] = request.args.get('language')
-    return session.get('language', default_lang)
-
 def get_timezone():
     user = getattr(g, 'user', None)
     if user is not None:
         return user.timezone
     return 'UT'
 
-app = Flask(__name__)
+bp = Blueprint('main', __name__)
+babel = Babel()
+babel_js = BabelJS()
+index_cache = PageCache()
+
+# Built for each request from the X-Ollama-URL header and kept on flask.g
+# (see before_request), so concurrent requests never share a client
+ollama_client = LocalProxy(lambda: g.ollama_client)
+
+# Rate limits and concurrency caps for the routes that change the Ollama server
+admission_control = AdmissionControl(upstream=lambda: g.ollama_client.base_url)
+
+def create_app(config=None):
+    """Create the application
+
+    Only what every request needs is set up here. The usage database, the
+    Ollama library scraper and the Ollama client are created on first use.
+    """
+    app = Flask(__name__)
+
+    app.config['BABEL_DEFAULT_LOCALE'] = os.environ.get('BABEL_DEFAULT_LOCALE', 'en')
+
+    # Use a more secure configuration for session cookies
+    app.config.update(
+        SESSION_COOKIE_SECURE=True,
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE='Lax',
+        PERMANENT_SESSION_LIFETIME=86400  # 24 hours
+    )
+
+    app.config['LANGUAGES'] =  {
+        'en': 'English',
+        'fr': 'French',
+    }
+
+    app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev_key_123')  # Required for session
 
-app.config['BABEL_DEFAULT_LOCALE'] = os.environ.get('BABEL_DEFAULT_LOCALE', 'en')
-babel = Babel(app, locale_selector=get_locale, timezone_selector=get_timezone)
-babel_js = BabelJS(app)
-ollama_client = OllamaClient()
+    # Static files are served from memory with content hashes, and the index
+    # page is rendered once per language (set CACHE_INDEX=false while editing templates)
+    app.config['CACHE_INDEX'] = os.environ.get('CACHE_INDEX', 'true').lower() != 'false'
 
-# Use a more secure configuration for session cookies
-app.config.update(
-    SESSION_COOKIE_SECURE=True,
-    SESSION_COOKIE_HTTPONLY=True,
-    SESSION_COOKIE_SAMESITE='Lax',
-    PERMANENT_SESSION_LIFETIME=86400  # 24 hours
-)
+    # Pulls, deletes, stops and config saves are rate limited per client and
+    # capped per Ollama server (set ADMISSION_CONTROL=false to turn this off)
+    app.config['ADMISSION_CONTROL'] = os.environ.get('ADMISSION_CONTROL', 'true').lower() != 'false'
 
-app.config['LANGUAGES'] =  {
-    'en': 'English',
-    'fr': 'French',
-}
+    if config:
+        app.config.update(config)
 
-app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev_key_123')  # Required for session
+    babel.init_app(app, locale_selector=get_locale, timezone_selector=get_timezone)
+    babel_js.init_app(app)
+    StaticAssets(app)
+    metrics.init_app(app)
 
-# Register translation function for templates
-app.jinja_env.globals.update(t=t)
+    # Register translation functions for templates, replacing Flask-Babel's
+    # per-call catalog lookup with the catalogs preloaded by translations
+    app.jinja_env.globals.update(t=t)
+    app.jinja_env.install_gettext_callables(gettext, ngettext, newstyle=True)
 
-@app.context_processor
+    app.register_blueprint(bp)
+    return app
+
+@bp.app_context_processor
 def inject_conf_var():
-    return dict(AVAILABLE_LANGUAGES=app.config['LANGUAGES'], CURRENT_LANGUAGE=session.get('language', request.accept_languages.best_match(app.config['LANGUAGES'].keys())))
+    return dict(AVAILABLE_LANGUAGES=current_app.config['LANGUAGES'], CURRENT_LANGUAGE=get_locale())
 
 def change_locale(lang):
     g.user['locale'] = lang
@@ -75,9 +109,11 @@ def with_error_handling(f):
             }), 500
     return decorated_function
 
-@app.before_request
+@bp.before_app_request
 def before_request():
-    global ollama_client
+    # Static files need neither the session nor an Ollama client
+    if request.endpoint == 'static':
+        return
 
     # Debug: Print all session data
     print("Current session data:", dict(session))
@@ -100,17 +136,19 @@ def before_request():
         base_url = 'http://' + base_url
 
     print(f"Using Ollama server URL: {base_url}")
-    ollama_client = OllamaClient(base_url=base_url)
+    g.ollama_client = OllamaClient(base_url=base_url)
 
-@app.route('/')
+@bp.route('/')
 def index():
     # Debug: Print current language and session info
     print(f"Current language from session: {session.get('language', 'Not set')}")
     print(f"All cookies: {request.cookies}")
     print(f"Session cookie: {request.cookies.get('session')}")
-    return render_template('index.html')
+    if not current_app.config['CACHE_INDEX']:
+        return render_template('index.html')
+    return index_cache.response(get_locale(), lambda: render_template('index.html'))
 
-@app.route('/api/language', methods=['POST'])
+@bp.route('/api/language', methods=['POST'])
 def change_language():
     """Change the application language"""
     try:
@@ -148,24 +186,24 @@ def change_language():
         print(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
-@app.route('/language=<language>')
+@bp.route('/language=<language>')
 def set_language(language=None):
     session['language'] = language
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/api/server/url')
+@bp.route('/api/server/url')
 def get_server_url():
     """Get the Ollama server URL from environment"""
     url = os.environ.get('OLLAMA_SERVER_URL', 'http://localhost:11434')
     return jsonify({'url': url})
 
-@app.route('/api/server/status')
+@bp.route('/api/server/status')
 @with_error_handling
 def server_status():
     status = ollama_client.check_server()
     return jsonify({'status': 'running' if status else 'stopped'})
 
-@app.route('/api/models', methods=['GET'])
+@bp.route('/api/models', methods=['GET'])
 @with_error_handling
 def get_models():
     response = ollama_client.list_models()
@@ -173,7 +211,7 @@ def get_models():
         return jsonify({'error': response['error']}), 503
     return jsonify(response)
 
-@app.route('/api/models/running', methods=['GET'])
+@bp.route('/api/models/running', methods=['GET'])
 @with_error_handling
 def get_running_models():
     response = ollama_client.list_running()
@@ -181,8 +219,9 @@ def get_running_models():
         return jsonify({'error': response['error']}), 503
     return jsonify(response)
 
-@app.route('/api/models/stop', methods=['POST'])
+@bp.route('/api/models/stop', methods=['POST'])
 @with_error_handling
+@admission_control.limit('stop')
 def stop_model():
     if not request.is_json:
         return jsonify({'error': 'Content-Type must be application/json'}), 400
@@ -202,8 +241,9 @@ def stop_model():
         }), 500
     return jsonify(result)
 
-@app.route('/api/models/delete', methods=['POST'])
+@bp.route('/api/models/delete', methods=['POST'])
 @with_error_handling
+@admission_control.limit('delete')
 def delete_model():
     model_name = request.json.get('name')
     if not model_name:
@@ -220,8 +260,9 @@ def delete_model():
         }), 500
     return jsonify(result)
 
-@app.route('/api/models/pull', methods=['POST'])
+@bp.route('/api/models/pull', methods=['POST'])
 @with_error_handling
+@admission_control.limit('pull')
 def pull_model():
     model_name = request.json.get('name')
     if not model_name:
@@ -232,29 +273,35 @@ def pull_model():
 
     try:
         url = f'{ollama_client.base_url}/api/pull'
-        response = requests.post(url,
-            headers=ollama_client._get_headers(),
-            json={'name': model_name},
-            stream=True)
-
-        response.raise_for_status()
-
-        # Process the streaming response
-        for line in response.iter_lines():
-            if line:
-                try:
-                    data = json.loads(line)
-                    # If we get a success status, break the loop
-                    if data.get('status') == 'success':
-                        break
-                except json.JSONDecodeError:
-                    continue
-
+        started = time.perf_counter()
+        with metrics.PullTracker() as tracker:
+            response = requests.post(url,
+                headers=ollama_client._get_headers(),
+                json={'name': model_name},
+                stream=True)
+
+            response.raise_for_status()
+
+            # Process the streaming response
+            for line in response.iter_lines():
+                if line:
+                    try:
+                        data = json.loads(line)
+                        tracker.update(data)
+                        # If we get a success status, break the loop
+                        if data.get('status') == 'success':
+                            break
+                    except json.JSONDecodeError:
+                        continue
+
+        metrics.observe_upstream('api/pull', 'POST', response.status_code, time.perf_counter() - started)
+        ollama_client.invalidate_model(model_name)
         return jsonify({'success': True, 'message': f'Successfully pulled model {model_name}'})
     except requests.exceptions.RequestException as e:
+        metrics.UPSTREAM_ERRORS.inc('api/pull', 'http')
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/models/search', methods=['POST'])
+@bp.route('/api/models/search', methods=['POST'])
 @with_error_handling
 def search_models():
     keyword = request.json.get('keyword', '')
@@ -292,6 +339,9 @@ def search_models():
             return jsonify({'models': filtered_models})
 
         else:  # source == 'ollama'
+            # Only needed by this scraper, so imported on first use
+            from bs4 import BeautifulSoup
+
             # Get models from Ollama library using BeautifulSoup
             response = requests.get('https://ollama.com/library')
             if response.status_code != 200:
@@ -330,18 +380,117 @@ def search_models():
         print(f"Error searching models: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/models/stats', methods=['GET'])
+@bp.route('/api/models/disk-usage', methods=['GET', 'POST'])
+@with_error_handling
+def get_disk_usage():
+    """Report unique, shared and reclaimable bytes for local models
+
+    Blob verification reads whole blobs, so it is only done on POST and
+    only for the blobs of the candidate models.
+    """
+    verify = False
+    if request.method == 'POST':
+        if not request.is_json:
+            return jsonify({'error': 'Content-Type must be application/json'}), 400
+        candidates = request.json.get('candidates')
+        verify = bool(request.json.get('verify', False))
+    else:
+        candidates = request.args.getlist('candidate') or None
+
+    if candidates is not None and not isinstance(candidates, list):
+        return jsonify({'error': 'candidates must be a list of model names'}), 400
+    if verify and not candidates:
+        return jsonify({
+            'error': 'verify requires a list of candidates',
+            'status': 'validation_error'
+        }), 400
+
+    usage = ollama_client.get_disk_usage(candidates=candidates, verify=verify)
+    if 'error' in usage:
+        return jsonify({'error': usage['error']}), 500
+    return jsonify(usage)
+
+@bp.route('/api/models/stats', methods=['GET'])
 @with_error_handling
 def get_all_model_stats():
     stats = ollama_client.get_model_stats()
     return jsonify(stats)
 
-@app.route('/api/models/<model_name>/stats', methods=['GET'])
+def _parse_time(value):
+    """Parse an ISO 8601 time filter into naive UTC, as timestamps are stored"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+@bp.route('/api/models/stats/export', methods=['GET'])
+@with_error_handling
+def export_model_stats():
+    """Stream usage rows, raw or summed per hour/day, as CSV, NDJSON, Arrow or Parquet"""
+    # Imported on first use so SQLAlchemy and pyarrow stay out of the startup path
+    from models import ModelUsage, ROLLUP_PERIODS
+    import usage_export
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in usage_export.available_formats():
+        return jsonify({
+            'error': f"format must be one of: {', '.join(usage_export.available_formats())}",
+            'status': 'validation_error'
+        }), 400
+
+    rollup = request.args.get('rollup') or None
+    if rollup is not None and rollup not in ROLLUP_PERIODS:
+        return jsonify({
+            'error': f"rollup must be one of: {', '.join(ROLLUP_PERIODS)}",
+            'status': 'validation_error'
+        }), 400
+
+    try:
+        since = _parse_time(request.args.get('since'))
+        until = _parse_time(request.args.get('until'))
+    except ValueError:
+        return jsonify({
+            'error': 'since and until must be ISO 8601 times',
+            'status': 'validation_error'
+        }), 400
+
+    rows = ModelUsage.iter_usage(
+        model_names=request.args.getlist('model'),
+        operations=request.args.getlist('operation'),
+        since=since,
+        until=until,
+        rollup=rollup
+    )
+    columns = ModelUsage.export_columns(rollup)
+    mimetype, extension = usage_export.FORMATS[fmt]
+    return Response(usage_export.export_chunks(fmt, columns, rows), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="ollama-usage.{extension}"'
+    })
+
+@bp.route('/api/models/details', methods=['POST'])
+@with_error_handling
+def get_models_details():
+    """Details and usage stats for a list of models, used by the comparison view"""
+    if not request.is_json:
+        return jsonify({'error': 'Content-Type must be application/json'}), 400
+
+    model_names = request.json.get('models')
+    if not isinstance(model_names, list) or not model_names:
+        return jsonify({
+            'error': t('select_models'),
+            'status': 'validation_error'
+        }), 400
+
+    return jsonify(ollama_client.get_models_details(model_names))
+
+@bp.route('/api/models/<model_name>/stats', methods=['GET'])
 @with_error_handling
 def get_model_stats(model_name):
     return jsonify(ollama_client.get_model_stats(model_name))
 
-@app.route('/api/models/<model_name>/config', methods=['GET'])
+@bp.route('/api/models/<model_name>/config', methods=['GET'])
 @with_error_handling
 def get_model_config(model_name):
     config = ollama_client.get_model_config(model_name)
@@ -349,8 +498,9 @@ def get_model_config(model_name):
         return jsonify({'error': config['error']}), 500
     return jsonify(config)
 
-@app.route('/api/models/<model_name>/config', methods=['POST'])
+@bp.route('/api/models/<model_name>/config', methods=['POST'])
 @with_error_handling
+@admission_control.limit('config')
 def save_model_config(model_name):
     """Save model configuration"""
     if not request.is_json:
@@ -372,7 +522,40 @@ def save_model_config(model_name):
 
     return jsonify(result)
 
-@app.errorhandler(Exception)
+def _batch_size(data):
+    """Tokens used by a batch save: one per model"""
+    models = data.get('models') if isinstance(data, dict) else None
+    return len(models) if isinstance(models, list) else 1
+
+@bp.route('/api/models/config/batch', methods=['POST'])
+@with_error_handling
+@admission_control.limit('config', cost=lambda: _batch_size(request.get_json(silent=True)))
+def save_model_configs():
+    """Save the configuration of several models in one call"""
+    if not request.is_json:
+        return jsonify({'error': 'Content-Type must be application/json'}), 400
+
+    data = request.json
+    configs = data.get('models') if isinstance(data, dict) else None
+    if not isinstance(configs, list) or not configs:
+        return jsonify({
+            'error': t('select_models'),
+            'status': 'validation_error'
+        }), 400
+
+    return jsonify(ollama_client.save_model_configs(configs))
+
+@bp.route('/metrics')
+def get_metrics():
+    """Expose counters and latencies in the Prometheus text format"""
+    families = metrics.running_model_families(ollama_client.probe_running())
+    try:
+        families += metrics.usage_families(ollama_client.get_model_stats())
+    except Exception as e:
+        print(f"Error collecting usage metrics: {str(e)}")
+    return metrics.REGISTRY.render(families), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
+@bp.app_errorhandler(Exception)
 def handle_error(error):
     print(f"Unhandled error: {str(error)}")
     print(traceback.format_exc())
@@ -383,4 +566,4 @@ def handle_error(error):
 
 if __name__ == '__main__':
     print(f"Starting Flask server with Ollama URL: {os.environ.get('OLLAMA_SERVER_URL', 'default URL not set')}")
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
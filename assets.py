@@ -0,0 +1,132 @@
+"""Fingerprinted static files and pre-rendered page caching"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 31536000  # one year
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+def compress_variants(data, mimetype):
+    """Build {encoding: bytes} for a payload, keeping only useful encodings"""
+    variants = {'identity': data}
+    if len(data) < MIN_COMPRESS_SIZE or not mimetype.startswith(COMPRESSIBLE_TYPES):
+        return variants
+
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gzipped) < len(data):
+        variants['gzip'] = gzipped
+    if brotli is not None:
+        compressed = brotli.compress(data)
+        if len(compressed) < len(data):
+            variants['br'] = compressed
+    return variants
+
+
+def negotiated_response(variants, mimetype, etag, cache_control):
+    """Serve the best encoding the client accepts, answering 304 when possible"""
+    encoding = 'identity'
+    for candidate in ('br', 'gzip'):
+        if candidate in variants and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+
+    response = Response(variants[encoding], mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    response.set_etag(f'{etag}-{encoding}')
+    return response.make_conditional(request)
+
+
+class StaticAsset:
+    __slots__ = ('filename', 'digest', 'mimetype', 'variants')
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.variants = compress_variants(data, self.mimetype)
+
+
+class StaticAssets:
+    """Serve files under the static folder from memory with content hashes
+
+    Every file is read, hashed and compressed once at startup. url_for('static')
+    then appends ?v=<hash>, and requests carrying the current hash are cached
+    by browsers as immutable for a year.
+    """
+
+    def __init__(self, app=None):
+        self.assets = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.folder = app.static_folder
+        self.load()
+        app.url_defaults(self._add_fingerprint)
+        app.view_functions['static'] = self.serve
+        app.extensions['static_assets'] = self
+
+    def load(self):
+        assets = {}
+        for root, _dirs, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    assets[filename] = StaticAsset(filename, f.read())
+        self.assets = assets
+
+    def _add_fingerprint(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            asset = self.assets.get(values['filename'])
+            if asset is not None:
+                values.setdefault('v', asset.digest)
+
+    def serve(self, filename):
+        asset = self.assets.get(filename)
+        if asset is None:
+            return current_app.send_static_file(filename)
+
+        if request.args.get('v') == asset.digest:
+            cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            cache_control = 'no-cache'
+        return negotiated_response(asset.variants, asset.mimetype, asset.digest, cache_control)
+
+
+class PageCache:
+    """Keep rendered pages per key (e.g. locale) with their compressed variants"""
+
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        page = self._pages.get(key)
+        if page is None:
+            data = render().encode('utf-8')
+            page = (hashlib.sha256(data).hexdigest()[:16], compress_variants(data, 'text/html'))
+            with self._lock:
+                self._pages[key] = page
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def response(self, key, render):
+        etag, variants = self.get_or_render(key, render)
+        return negotiated_response(variants, 'text/html', etag, 'no-cache')
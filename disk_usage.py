@@ -0,0 +1,182 @@
+"""Disk usage and layer deduplication analysis for Ollama model blobs"""
+import hashlib
+import json
+import mmap
+import os
+import re
+
+DEFAULT_REGISTRY = 'registry.ollama.ai'
+DEFAULT_NAMESPACE = 'library'
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+_BLOB_DIGEST_RE = re.compile(r'sha256[-:]([0-9a-f]{64})')
+
+
+def blob_filename(digest):
+    """Convert a layer digest (sha256:abc...) to its blob file name (sha256-abc...)"""
+    return digest.replace(':', '-', 1)
+
+
+def digest_from_path(path):
+    """Extract a layer digest from a blob path such as /models/blobs/sha256-abc..."""
+    match = _BLOB_DIGEST_RE.search(path or '')
+    if not match:
+        return None
+    return f'sha256:{match.group(1)}'
+
+
+def model_name_from_manifest(manifests_dir, manifest_path):
+    """Build the model name reported by /api/tags from a manifest path"""
+    parts = os.path.relpath(manifest_path, manifests_dir).split(os.sep)
+    if len(parts) < 4:
+        return None
+
+    host, namespace, model, tag = parts[-4:]
+    if host == DEFAULT_REGISTRY and namespace == DEFAULT_NAMESPACE:
+        return f'{model}:{tag}'
+    if host == DEFAULT_REGISTRY:
+        return f'{namespace}/{model}:{tag}'
+    return f'{host}/{namespace}/{model}:{tag}'
+
+
+def parse_manifest(manifest):
+    """Return {digest: size} for the config blob and every layer of a manifest"""
+    layers = {}
+    entries = list(manifest.get('layers', []))
+    if manifest.get('config'):
+        entries.append(manifest['config'])
+
+    for entry in entries:
+        digest = entry.get('digest')
+        if digest:
+            layers[digest] = int(entry.get('size') or 0)
+    return layers
+
+
+def scan_models_dir(models_dir):
+    """Read every manifest under models_dir and return {model_name: {digest: size}}
+
+    The directory is only ever read; blobs are not opened here.
+    """
+    manifests_dir = os.path.join(models_dir, 'manifests')
+    if not os.path.isdir(manifests_dir):
+        raise FileNotFoundError(f'No manifests directory found in {models_dir}')
+
+    model_layers = {}
+    for root, _dirs, files in os.walk(manifests_dir):
+        for filename in files:
+            path = os.path.join(root, filename)
+            name = model_name_from_manifest(manifests_dir, path)
+            if not name:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    model_layers[name] = parse_manifest(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable manifest {path}: {str(e)}")
+    return model_layers
+
+
+def hash_blob(path, chunk_size=HASH_CHUNK_SIZE):
+    """Stream a blob through sha256 using a read-only memory map"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return f'sha256:{sha.hexdigest()}'
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, chunk_size):
+                    sha.update(view[offset:offset + chunk_size])
+            finally:
+                view.release()
+    return f'sha256:{sha.hexdigest()}'
+
+
+def check_blobs(models_dir, digests, verify=()):
+    """Compare manifest digests against the blobs directory
+
+    Returns the digests whose blob is missing and, of the digests listed
+    in verify, those whose content does not hash to their name. Hashing
+    reads every byte of a blob, so verify should stay small.
+    """
+    blobs_dir = os.path.join(models_dir, 'blobs')
+    missing = []
+    corrupted = []
+    on_disk_bytes = 0
+
+    for digest in sorted(digests):
+        path = os.path.join(blobs_dir, blob_filename(digest))
+        try:
+            on_disk_bytes += os.stat(path).st_size
+        except OSError:
+            missing.append(digest)
+            continue
+
+        if digest in verify and hash_blob(path) != digest:
+            corrupted.append(digest)
+
+    return {
+        'on_disk_bytes': on_disk_bytes,
+        'missing_blobs': missing,
+        'corrupted_blobs': corrupted
+    }
+
+
+def analyze_usage(model_layers, candidates=None):
+    """Compute unique, shared and reclaimable bytes from {model: {digest: size}}
+
+    A layer is unique to a model when no other model references it. The
+    reclaimable space of a set of candidates is the size of every layer
+    referenced only by models in that set.
+    """
+    references = {}
+    sizes = {}
+    for model, layers in model_layers.items():
+        for digest, size in layers.items():
+            references.setdefault(digest, set()).add(model)
+            sizes[digest] = size
+
+    models = {}
+    for model, layers in model_layers.items():
+        unique_bytes = 0
+        shared_bytes = 0
+        for digest, size in layers.items():
+            if len(references[digest]) == 1:
+                unique_bytes += size
+            else:
+                shared_bytes += size
+        models[model] = {
+            'total_bytes': unique_bytes + shared_bytes,
+            'unique_bytes': unique_bytes,
+            'shared_bytes': shared_bytes,
+            'shared_with': sorted({
+                other
+                for digest in layers
+                for other in references[digest]
+                if other != model
+            })
+        }
+
+    result = {
+        'models': models,
+        'listed_bytes': sum(m['total_bytes'] for m in models.values()),
+        'deduplicated_bytes': sum(sizes.values())
+    }
+
+    if candidates is not None:
+        candidate_set = set(candidates)
+        reclaimable = sum(
+            sizes[digest]
+            for digest, owners in references.items()
+            if owners <= candidate_set
+        )
+        result['reclaimable'] = {
+            'candidates': sorted(candidate_set),
+            'unknown_models': sorted(candidate_set - set(model_layers)),
+            'reclaimable_bytes': reclaimable
+        }
+
+    return result
@@ -0,0 +1,301 @@
+"""Prometheus style metrics for the manager and the Ollama servers it calls
+
+Counters and histograms are sharded per thread: each thread only ever
+writes to its own dict, so recording never takes a lock. Shards are summed
+when /metrics is scraped. The shard of a thread that has exited is folded
+into a base total, so short-lived request threads do not accumulate.
+"""
+import threading
+import time
+from flask import g, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Base for metrics whose samples live in per-thread dicts"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []  # (owner thread, shard)
+        self._base = {}    # merged shards of threads that have exited
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # Only taken once per thread, never on the recording path
+            with self._shards_lock:
+                self._prune()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _prune(self):
+        """Fold the shards of exited threads into the base; caller holds the lock"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                # The thread is gone, so nothing writes to this shard any more
+                for labels, value in shard.items():
+                    self._base[labels] = self._merge(self._base.get(labels), value)
+        self._shards = live
+
+    @staticmethod
+    def _merge(total, value):
+        return value if total is None else total + value
+
+    def _snapshots(self):
+        with self._shards_lock:
+            self._prune()
+            # The base is only replaced value by value, so a shallow copy is stable
+            snapshots = [self._base.copy()]
+            shards = [shard for _thread, shard in self._shards]
+        # dict.copy() is atomic under the GIL, so writers never block here
+        return snapshots + [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self):
+        totals = {}
+        for snapshot in self._snapshots():
+            for labels, value in snapshot.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self):
+        for labels, value in sorted(self.collect().items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Gauge(Counter):
+    """Gauge built from per-thread increments and decrements"""
+
+    type = 'gauge'
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Sharded):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    @staticmethod
+    def _merge(total, value):
+        # Builds a new list: snapshots of the base may still be reading the old one
+        return list(value) if total is None else [a + b for a, b in zip(total, value)]
+
+    def observe(self, *labels, value):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # One slot per bucket, then +Inf, then the sum
+            state = shard[labels] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[index] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    def samples(self):
+        totals = {}
+        for snapshot in self._snapshots():
+            for labels, state in snapshot.items():
+                merged = totals.setdefault(labels, [0] * len(state))
+                for index, value in enumerate(state):
+                    merged[index] += value
+
+        for labels, state in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                le = ('le', _format_value(float(bound)))
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+            label_text = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{label_text} {_format_value(state[-1])}'
+            yield f'{self.name}_count{label_text} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, extra_families=()):
+        """Render every metric, plus (name, type, help, samples) families computed at scrape time"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        for name, metric_type, documentation, samples in extra_families:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples:
+                label_text = _format_labels(labels.keys(), labels.values())
+                lines.append(f'{name}{label_text} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'ollama_manager_http_requests_total',
+    'HTTP requests handled, by route, method and status',
+    ('route', 'method', 'status')))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    'ollama_manager_http_request_duration_seconds',
+    'HTTP request latency by route and method',
+    ('route', 'method')))
+UPSTREAM_REQUESTS = REGISTRY.register(Counter(
+    'ollama_manager_upstream_requests_total',
+    'Requests sent to Ollama, by endpoint, method and status',
+    ('endpoint', 'method', 'status')))
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    'ollama_manager_upstream_request_duration_seconds',
+    'Ollama request latency by endpoint and method',
+    ('endpoint', 'method')))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    'ollama_manager_upstream_retries_total',
+    'Ollama requests retried by OllamaClient',
+    ('endpoint',)))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    'ollama_manager_upstream_errors_total',
+    'Failed Ollama request attempts, by endpoint and error kind',
+    ('endpoint', 'kind')))
+PULL_JOBS_ACTIVE = REGISTRY.register(Gauge(
+    'ollama_manager_pull_jobs_active',
+    'Model pulls currently in progress'))
+PULL_BYTES = REGISTRY.register(Counter(
+    'ollama_manager_pull_bytes_total',
+    'Bytes downloaded by model pulls'))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    'ollama_manager_admission_rejected_total',
+    'Mutating requests turned away by admission control, by operation and reason',
+    ('operation', 'reason')))
+ADMISSION_QUEUED = REGISTRY.register(Gauge(
+    'ollama_manager_admission_queued',
+    'Mutating requests waiting for a free slot on an Ollama server'))
+
+
+def observe_upstream(endpoint, method, status, seconds):
+    endpoint = endpoint.lstrip('/')
+    UPSTREAM_REQUESTS.inc(endpoint, method, str(status))
+    UPSTREAM_DURATION.observe(endpoint, method, value=seconds)
+
+
+def _start_timer():
+    g._metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = getattr(g, '_metrics_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+        HTTP_DURATION.observe(route, request.method, value=time.perf_counter() - started)
+    return response
+
+
+def init_app(app):
+    """Time every request; registered first so the other hooks are included"""
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_timer)
+    app.after_request(_record_request)
+
+
+class PullTracker:
+    """Count the bytes of a streaming /api/pull from its progress lines"""
+
+    def __init__(self):
+        self.completed = {}
+
+    def __enter__(self):
+        PULL_JOBS_ACTIVE.inc()
+        return self
+
+    def __exit__(self, *exc):
+        PULL_JOBS_ACTIVE.dec()
+        return False
+
+    def update(self, data):
+        digest = data.get('digest')
+        completed = data.get('completed')
+        if digest and completed is not None:
+            delta = completed - self.completed.get(digest, 0)
+            if delta > 0:
+                PULL_BYTES.inc(amount=delta)
+            self.completed[digest] = completed
+
+
+def running_model_families(running):
+    """Scrape-time families from an /api/ps response"""
+    if 'error' in running:
+        return [('ollama_up', 'gauge', 'Whether the Ollama server answered /api/ps', [({}, 0)])]
+
+    models = running.get('models', [])
+    return [
+        ('ollama_up', 'gauge', 'Whether the Ollama server answered /api/ps', [({}, 1)]),
+        ('ollama_loaded_models', 'gauge', 'Models currently loaded by Ollama', [({}, len(models))]),
+        ('ollama_loaded_model_size_bytes', 'gauge', 'Memory used by each loaded model',
+         [({'model': m.get('name', '')}, m.get('size', 0)) for m in models]),
+        ('ollama_loaded_model_vram_bytes', 'gauge', 'VRAM used by each loaded model',
+         [({'model': m.get('name', '')}, m.get('size_vram', 0)) for m in models]),
+    ]
+
+
+def usage_families(stats):
+    """Scrape-time families from ModelUsage.get_model_stats()"""
+    return [
+        ('ollama_manager_usage_operations_total', 'counter', 'Logged model operations',
+         [({'operation': op}, count) for op, count in sorted(stats.get('operations_by_type', {}).items())]),
+        ('ollama_manager_usage_prompt_tokens_total', 'counter', 'Logged prompt tokens',
+         [({}, stats.get('total_prompt_tokens', 0))]),
+        ('ollama_manager_usage_completion_tokens_total', 'counter', 'Logged completion tokens',
+         [({}, stats.get('total_completion_tokens', 0))]),
+        ('ollama_manager_usage_duration_seconds_total', 'counter', 'Logged generation time',
+         [({}, stats.get('total_duration', 0))]),
+    ]
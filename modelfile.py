@@ -0,0 +1,296 @@
+"""Modelfile parser and serializer
+
+Parses the Ollama Modelfile grammar in a single left-to-right pass:
+
+    FROM <model or blob path>
+    PARAMETER <name> <value>        (may repeat, e.g. several stop tokens)
+    TEMPLATE / SYSTEM / LICENSE <value>
+    ADAPTER <path>
+    MESSAGE <role> <value>
+    REQUIRES <ollama version>
+
+Values are bare (to end of line), "quoted" (backslash escapes) or
+triple-quoted blocks spanning several lines. Comments, blank lines and the
+original spelling of every instruction are kept, so an unmodified
+Modelfile serializes back to exactly the text it was parsed from.
+
+Instructions this module does not know (newer Ollama versions add some,
+e.g. RENDERER and PARSER) are kept as opaque instructions that serialize
+back unchanged. Pass strict=True to reject them, for text a user wrote.
+"""
+import re
+
+COMMANDS = ('FROM', 'PARAMETER', 'TEMPLATE', 'SYSTEM', 'LICENSE', 'ADAPTER', 'MESSAGE', 'REQUIRES')
+NAMED_COMMANDS = ('PARAMETER', 'MESSAGE')
+HEREDOC = '"""'
+
+# Every pattern is anchored at the current position with .match(text, pos)
+# and only moves forward, which keeps parsing linear in the input size.
+_TRIVIA_RE = re.compile(r'(?:[ \t]*(?:#[^\n]*)?(?:\r?\n))*')
+_LAST_LINE_TRIVIA_RE = re.compile(r'[ \t]*(?:#[^\n]*)?\Z')
+_COMMAND_RE = re.compile(r'[ \t]*([A-Za-z]+)(?=[ \t\r\n]|\Z)[ \t]*')
+_NAME_RE = re.compile(r'(\S+)[ \t]*')
+_QUOTED_RE = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+_BARE_RE = re.compile(r'[^\r\n]*')
+_LINE_END_RE = re.compile(r'[^\r\n]*(?:\r?\n|\Z)')
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_BARE_SAFE_RE = re.compile(r'[^\s"]+(?:[ \t]+[^\s"]+)*')
+
+
+class ModelfileError(ValueError):
+    """Raised when a Modelfile cannot be parsed"""
+
+    def __init__(self, message, line):
+        super().__init__(f'{message} (line {line})')
+        self.line = line
+
+
+class Instruction:
+    """A single Modelfile instruction and the source text it came from"""
+
+    __slots__ = ('command', 'name', 'value', 'quote', 'leading', 'raw')
+
+    def __init__(self, command, value, name=None, quote=None, leading='', raw=None):
+        self.command = command.upper()
+        self.name = name
+        self.value = value
+        self.quote = quote
+        self.leading = leading
+        self.raw = raw
+
+    def __repr__(self):
+        return f'Instruction({self.command!r}, {self.value!r}, name={self.name!r})'
+
+    def update(self, value):
+        """Change the value, dropping the original source text if it differs"""
+        if value != self.value:
+            self.value = value
+            self.raw = None
+
+    def render(self):
+        """Render this instruction from its fields, ignoring the original text"""
+        head = self.command if self.name is None else f'{self.command} {self.name}'
+        return f'{head} {quote_value(self.value, self.quote, self.command)}\n'
+
+    def serialize(self):
+        return self.leading + (self.raw if self.raw is not None else self.render())
+
+
+def quote_value(value, preferred=None, command=None):
+    """Quote a value so that parsing it back yields the same string"""
+    value = str(value)
+    heredoc_ok = HEREDOC not in value and not value.endswith('"')
+    bare_ok = bool(_BARE_SAFE_RE.fullmatch(value)) and not value.startswith('#')
+
+    if preferred == '' and bare_ok:
+        return value
+    if heredoc_ok and (preferred == HEREDOC or '\n' in value):
+        return f'{HEREDOC}{value}{HEREDOC}'
+    if preferred is None:
+        if command in ('TEMPLATE', 'SYSTEM', 'LICENSE', 'MESSAGE') and heredoc_ok:
+            return f'{HEREDOC}{value}{HEREDOC}'
+        if bare_ok:
+            return value
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _line_number(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+def _read_value(text, pos):
+    """Read a value starting at pos, returning (value, quote, end)"""
+    if text.startswith(HEREDOC, pos):
+        end = text.find(HEREDOC, pos + 3)
+        if end == -1:
+            raise ModelfileError('Unterminated """ block', _line_number(text, pos))
+        return text[pos + 3:end], HEREDOC, end + 3
+
+    if text.startswith('"', pos):
+        match = _QUOTED_RE.match(text, pos)
+        if not match:
+            raise ModelfileError('Unterminated quoted value', _line_number(text, pos))
+        return _ESCAPE_RE.sub(r'\1', match.group(1)), '"', match.end()
+
+    match = _BARE_RE.match(text, pos)
+    return match.group(0).rstrip(), '', match.end()
+
+
+def tokenize(text, strict=False):
+    """Split a Modelfile into instructions in a single pass
+
+    Unknown instructions raise ModelfileError when strict, and are read
+    like any single-valued instruction otherwise.
+
+    Returns the list of Instruction objects and the trailing trivia
+    (comments and blank lines) after the last instruction.
+    """
+    instructions = []
+    pos = 0
+    length = len(text)
+
+    while True:
+        trivia_end = _TRIVIA_RE.match(text, pos).end()
+        if trivia_end == length or _LAST_LINE_TRIVIA_RE.match(text, trivia_end):
+            return instructions, text[pos:]
+
+        match = _COMMAND_RE.match(text, trivia_end)
+        if not match:
+            raise ModelfileError('Expected an instruction', _line_number(text, trivia_end))
+        command = match.group(1).upper()
+        if strict and command not in COMMANDS:
+            raise ModelfileError(f'Unknown instruction {match.group(1)}', _line_number(text, trivia_end))
+        cursor = match.end()
+
+        name = None
+        if command in NAMED_COMMANDS:
+            name_match = _NAME_RE.match(text, cursor)
+            if not name_match:
+                raise ModelfileError(f'{command} requires a name', _line_number(text, cursor))
+            name = name_match.group(1)
+            cursor = name_match.end()
+
+        value, quote, cursor = _read_value(text, cursor)
+        cursor = _LINE_END_RE.match(text, cursor).end()
+
+        instructions.append(Instruction(
+            command,
+            value,
+            name=name,
+            quote=quote,
+            leading=text[pos:trivia_end],
+            raw=text[trivia_end:cursor]
+        ))
+        pos = cursor
+
+
+class Modelfile:
+    """Parsed Modelfile that serializes back to its original text"""
+
+    def __init__(self, instructions=None, trailing=''):
+        self.instructions = list(instructions or [])
+        self.trailing = trailing
+
+    @classmethod
+    def parse(cls, text, strict=False):
+        instructions, trailing = tokenize(text or '', strict)
+        return cls(instructions, trailing)
+
+    def serialize(self):
+        return ''.join(i.serialize() for i in self.instructions) + self.trailing
+
+    __str__ = serialize
+
+    def find(self, command, name=None):
+        """Return every instruction matching command (and name, if given)"""
+        command = command.upper()
+        return [
+            i for i in self.instructions
+            if i.command == command and (name is None or i.name == name)
+        ]
+
+    def get(self, command, default=None):
+        """Return the value of the last matching instruction, as Ollama does"""
+        found = self.find(command)
+        return found[-1].value if found else default
+
+    @property
+    def parameters(self):
+        """Parameters as {name: value}, with repeated names collected in lists"""
+        parameters = {}
+        for instruction in self.find('PARAMETER'):
+            if instruction.name not in parameters:
+                parameters[instruction.name] = instruction.value
+            elif isinstance(parameters[instruction.name], list):
+                parameters[instruction.name].append(instruction.value)
+            else:
+                parameters[instruction.name] = [parameters[instruction.name], instruction.value]
+        return parameters
+
+    @property
+    def messages(self):
+        return [{'role': i.name, 'content': i.value} for i in self.find('MESSAGE')]
+
+    def append(self, command, value, name=None):
+        instruction = Instruction(command, value, name=name)
+        self.instructions.append(instruction)
+        return instruction
+
+    def remove(self, command, name=None):
+        command = command.upper()
+        self.instructions = [
+            i for i in self.instructions
+            if not (i.command == command and (name is None or i.name == name))
+        ]
+
+    def set(self, command, value):
+        """Set a single-valued instruction, keeping its position if present"""
+        found = self.find(command)
+        if not found:
+            return self.append(command, value)
+        for extra in found[:-1]:
+            self.instructions.remove(extra)
+        found[-1].update(value)
+        return found[-1]
+
+    def set_parameter(self, name, value):
+        """Set a parameter; a list value produces one PARAMETER line per item"""
+        values = [str(v) for v in value] if isinstance(value, (list, tuple)) else [str(value)]
+        existing = self.find('PARAMETER', name)
+
+        for instruction, new_value in zip(existing, values):
+            instruction.update(new_value)
+        for instruction in existing[len(values):]:
+            self.instructions.remove(instruction)
+
+        if len(values) > len(existing):
+            index = self.instructions.index(existing[-1]) + 1 if existing else len(self.instructions)
+            for new_value in values[len(existing):]:
+                self.instructions.insert(index, Instruction('PARAMETER', new_value, name=name))
+                index += 1
+
+
+def parse(text, strict=False):
+    return Modelfile.parse(text, strict)
+
+
+def _same_value(old, new):
+    """Compare parameter values semantically (numbers by value, lists item by item)"""
+    if old is None or new is None:
+        return old is new
+    if isinstance(old, list) or isinstance(new, list):
+        old_items = old if isinstance(old, list) else [old]
+        new_items = new if isinstance(new, list) else [new]
+        return len(old_items) == len(new_items) and all(
+            _same_value(a, b) for a, b in zip(old_items, new_items)
+        )
+    try:
+        return float(old) == float(new)
+    except (TypeError, ValueError):
+        return str(old) == str(new)
+
+
+def diff_config(current, system=None, template=None, parameters=None):
+    """Return the fields of a requested config that differ from the current one
+
+    Empty system/template values mean "leave unchanged", matching how
+    save_model_config builds the Modelfile. They are compared without
+    surrounding whitespace, which the UI trims before sending. The result
+    is empty when the save would be a no-op.
+    """
+    diff = {}
+    if system and system.strip() != current.get('system', '').strip():
+        diff['system'] = {'old': current.get('system', ''), 'new': system}
+    if template and template.strip() != current.get('template', '').strip():
+        diff['template'] = {'old': current.get('template', ''), 'new': template}
+
+    current_parameters = current.get('parameters', {})
+    changed = {}
+    for key, value in (parameters or {}).items():
+        old = current_parameters.get(key)
+        if not _same_value(old, value):
+            changed[key] = {'old': old, 'new': value}
+    if changed:
+        diff['parameters'] = changed
+    return diff
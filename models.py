@@ -1,11 +1,34 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float
+from sqlalchemy import create_engine, func, Column, Integer, String, DateTime, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+import os
+import threading
+
+DEFAULT_DATABASE_URL = 'sqlite:///ollama_stats.db'
+EXPORT_BATCH_SIZE = 10000
+ROLLUP_PERIODS = ('hour', 'day')
 
 Base = declarative_base()
-engine = create_engine('sqlite:///ollama_stats.db')
-Session = sessionmaker(bind=engine)
+Session = sessionmaker()
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Create the engine and the tables on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(os.environ.get('STATS_DATABASE_URL', DEFAULT_DATABASE_URL))
+                Base.metadata.create_all(engine)
+                Session.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def get_session():
+    get_engine()
+    return Session()
 
 class ModelUsage(Base):
     __tablename__ = 'model_usage'
@@ -20,7 +43,7 @@ class ModelUsage(Base):
 
     @classmethod
     def log_usage(cls, model_name, operation, prompt_tokens, completion_tokens, total_duration):
-        session = Session()
+        session = get_session()
         try:
             usage = cls(
                 model_name=model_name,
@@ -36,7 +59,7 @@ class ModelUsage(Base):
 
     @classmethod
     def get_model_stats(cls, model_name=None):
-        session = Session()
+        session = get_session()
         try:
             query = session.query(cls)
             if model_name:
@@ -60,5 +83,120 @@ class ModelUsage(Base):
         finally:
             session.close()
 
-# Create tables
-Base.metadata.create_all(engine)
+    @classmethod
+    def export_columns(cls, rollup=None):
+        if rollup:
+            return ['period', 'model_name', 'operation', 'operations', 'prompt_tokens',
+                    'completion_tokens', 'total_duration']
+        return ['id', 'timestamp', 'model_name', 'operation', 'prompt_tokens',
+                'completion_tokens', 'total_duration']
+
+    @classmethod
+    def _period(cls, dialect, rollup):
+        """SQL expression truncating the timestamp to the start of its hour or day"""
+        if dialect == 'sqlite':
+            fmt = '%Y-%m-%d %H:00:00' if rollup == 'hour' else '%Y-%m-%d 00:00:00'
+            return func.strftime(fmt, cls.timestamp)
+        if dialect in ('mysql', 'mariadb'):
+            fmt = '%Y-%m-%d %H:00:00' if rollup == 'hour' else '%Y-%m-%d 00:00:00'
+            return func.date_format(cls.timestamp, fmt)
+        return func.date_trunc(rollup, cls.timestamp)
+
+    @classmethod
+    def iter_usage(cls, model_names=None, operations=None, since=None, until=None,
+                   rollup=None, batch_size=EXPORT_BATCH_SIZE):
+        """Yield usage rows as tuples in export_columns() order
+
+        Rows are fetched batch_size at a time through a server-side cursor
+        (where the database has one), so memory use does not grow with the
+        number of rows. With rollup ('hour' or 'day') rows are summed per
+        period, model and operation instead.
+        """
+        session = get_session()
+        try:
+            if rollup:
+                period = cls._period(get_engine().dialect.name, rollup).label('period')
+                query = session.query(
+                    period,
+                    cls.model_name,
+                    cls.operation,
+                    func.count(cls.id),
+                    func.sum(cls.prompt_tokens),
+                    func.sum(cls.completion_tokens),
+                    func.sum(cls.total_duration)
+                )
+            else:
+                query = session.query(
+                    cls.id,
+                    cls.timestamp,
+                    cls.model_name,
+                    cls.operation,
+                    cls.prompt_tokens,
+                    cls.completion_tokens,
+                    cls.total_duration
+                )
+
+            if model_names:
+                query = query.filter(cls.model_name.in_(model_names))
+            if operations:
+                query = query.filter(cls.operation.in_(operations))
+            if since is not None:
+                query = query.filter(cls.timestamp >= since)
+            if until is not None:
+                query = query.filter(cls.timestamp < until)
+
+            if rollup:
+                query = query.group_by(period, cls.model_name, cls.operation).order_by(
+                    period, cls.model_name, cls.operation)
+            else:
+                query = query.order_by(cls.id)
+
+            query = query.execution_options(stream_results=True, yield_per=batch_size)
+            for row in query:
+                if rollup and isinstance(row[0], str):
+                    # SQLite and MySQL return the period as text
+                    row = (datetime.fromisoformat(row[0]),) + tuple(row[1:])
+                yield tuple(row)
+        finally:
+            session.close()
+
+    @classmethod
+    def get_stats_for_models(cls, model_names):
+        """Get usage statistics for several models with a single grouped query"""
+        stats = {
+            name: {
+                'total_operations': 0,
+                'total_prompt_tokens': 0,
+                'total_completion_tokens': 0,
+                'total_duration': 0,
+                'operations_by_type': {}
+            }
+            for name in model_names
+        }
+        if not stats:
+            return stats
+
+        session = get_session()
+        try:
+            rows = session.query(
+                cls.model_name,
+                cls.operation,
+                func.count(cls.id),
+                func.sum(cls.prompt_tokens),
+                func.sum(cls.completion_tokens),
+                func.sum(cls.total_duration)
+            ).filter(
+                cls.model_name.in_(list(stats))
+            ).group_by(cls.model_name, cls.operation).all()
+
+            for name, operation, count, prompt_tokens, completion_tokens, duration in rows:
+                model_stats = stats[name]
+                model_stats['total_operations'] += count
+                model_stats['total_prompt_tokens'] += prompt_tokens or 0
+                model_stats['total_completion_tokens'] += completion_tokens or 0
+                model_stats['total_duration'] += duration or 0
+                model_stats['operations_by_type'][operation] = count
+
+            return stats
+        finally:
+            session.close()
@@ -1,23 +1,61 @@
 import requests
-from flask_babel import gettext
+from translations import force_locale, get_locale, gettext
 from requests.exceptions import ConnectionError, RequestException, Timeout
-from models import ModelUsage
+import disk_usage
+import metrics
+from singleflight import SingleFlight
+from modelfile import Instruction, Modelfile, ModelfileError, diff_config
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
 import os
 import json
 
+# Parsed model configs keyed by model digest, shared by every client instance
+CONFIG_CACHE_SIZE = 256
+_config_cache = OrderedDict()
+_config_cache_lock = threading.Lock()
+
+# Identical concurrent read requests to the same server share one upstream call
+COALESCED_POST_ENDPOINTS = ('api/show',)
+_inflight = SingleFlight()
+
+# /metrics scrapes probe /api/ps once, well inside Prometheus' 10 s scrape timeout
+METRICS_PROBE_TIMEOUT = 2
+
+# /api/show responses, kept for about one UI refresh interval. Keyed by the
+# client-supplied server URL too, so the number of entries is bounded.
+SHOW_CACHE_TTL = 30
+SHOW_CACHE_SIZE = 512
+_show_cache = OrderedDict()
+_show_cache_lock = threading.Lock()
+
+# Shared by every request so concurrent comparisons cannot multiply threads
+DETAILS_WORKERS = 8
+_details_pool = ThreadPoolExecutor(max_workers=DETAILS_WORKERS, thread_name_prefix='ollama-details')
+
+
+def normalize_model_name(name):
+    """Add the :latest tag Ollama implies when a model name has none"""
+    if ':' in name.rsplit('/', 1)[-1]:
+        return name
+    return f'{name}:latest'
+
+
 class OllamaClient:
     def __init__(self, base_url=None):
         self.base_url = base_url or os.environ.get('OLLAMA_SERVER_URL', 'http://localhost:11434')
         if self.base_url.endswith('/'):
             self.base_url = self.base_url[:-1]
         self.api_key = os.environ.get('OLLAMA_API_KEY')
+        self.models_dir = os.environ.get('OLLAMA_MODELS_DIR')
         self.max_retries = 3
         self.retry_delay = 1
         self._server_status = None
         self._last_check = 0
         self._check_interval = 5
-        print( gettext("Initialized OllamaClient with base URL: %s" % self.base_url) )
+        print( gettext("Initialized OllamaClient with base URL: %s") % self.base_url )
 
     def _get_headers(self):
         headers = {'Content-Type': 'application/json'}
@@ -26,21 +64,35 @@ class OllamaClient:
         return headers
 
     def _handle_request(self, method, endpoint, **kwargs):
-        """Generic method to handle requests with retry mechanism"""
+        """Generic method to handle requests with retry mechanism
+
+        Read requests (GETs and /api/show) are coalesced: concurrent callers
+        asking the same server for the same endpoint and body share one call.
+        """
         if endpoint.startswith('/'):
             endpoint = endpoint[1:]
 
+        method_name = getattr(method, '__name__', 'request').upper()
+        if method_name == 'GET' or endpoint in COALESCED_POST_ENDPOINTS:
+            key = (self.base_url, method_name, endpoint, json.dumps(kwargs.get('json'), sort_keys=True))
+            return _inflight.do(key, lambda: self._send_with_retries(method, method_name, endpoint, **kwargs))
+        return self._send_with_retries(method, method_name, endpoint, **kwargs)
+
+    def _send_with_retries(self, method, method_name, endpoint, **kwargs):
         url = f'{self.base_url}/{endpoint}'
         retries = 0
         last_error = None
         current_delay = self.retry_delay
 
         while retries < self.max_retries:
+            started = time.perf_counter()
+            status = 'error'
             try:
                 kwargs['timeout'] = kwargs.get('timeout', 30)
                 kwargs['headers'] = {**self._get_headers(), **kwargs.get('headers', {})}
 
                 response = method(url, **kwargs)
+                status = response.status_code
                 if response.status_code == 404:
                     return {'models': []} if 'tags' in endpoint or 'ps' in endpoint else {}
 
@@ -48,44 +100,75 @@ class OllamaClient:
                 return response.json() if response.content else {}
 
             except ConnectionError:
+                metrics.UPSTREAM_ERRORS.inc(endpoint, 'connection')
                 last_error = gettext("Unable to connect to Ollama server")
             except Timeout:
+                metrics.UPSTREAM_ERRORS.inc(endpoint, 'timeout')
                 last_error = gettext("Connection to Ollama server timed out")
             except RequestException as e:
+                metrics.UPSTREAM_ERRORS.inc(endpoint, 'http')
                 if hasattr(e, 'response') and e.response and e.response.status_code == 503:
                     last_error = gettext("Ollama server is not running")
                 else:
-                    last_error = gettext("Server error: %s" % str(e))
+                    last_error = gettext("Server error: %s") % str(e)
+            finally:
+                metrics.observe_upstream(endpoint, method_name, status, time.perf_counter() - started)
 
             retries += 1
             if retries < self.max_retries:
+                metrics.UPSTREAM_RETRIES.inc(endpoint)
                 time.sleep(current_delay)
                 current_delay *= 2
 
         return {'error': last_error}
 
-    def save_model_config(self, model_name, system=None, template=None, parameters=None):
-        """Save model configuration by creating a new custom model"""
-        try:
-            # Build Model file content
-            modelfile = f"FROM {model_name}\n"
+    def save_model_config(self, model_name, system=None, template=None, parameters=None, digests=None):
+        """Save model configuration by creating a new custom model
 
-            # Add parameters if provided
-            if parameters:
-                for key, value in parameters.items():
-                    modelfile += f'PARAMETER {key} {value}\n'
+        The requested values are compared with the model's current config
+        first; saves that would not change anything skip /api/create.
+        """
+        try:
+            current = self._get_cached_config(model_name, digests)
+            if 'error' in current:
+                return {'success': False, 'error': current['error']}
+
+            diff = diff_config(current, system=system, template=template, parameters=parameters)
+            if not diff:
+                return {
+                    'success': True,
+                    'changed': False,
+                    'diff': {},
+                    'message': gettext("No changes to save for %(model)s", model=model_name)
+                }
+
+            # Edit the current Modelfile in place so everything the request
+            # does not touch (other parameters, messages, comments) is kept
+            # as it was. FROM points at the model itself, which already
+            # carries the weights and adapters, so the server-local blob
+            # paths of FROM and ADAPTER are not sent back.
+            config = Modelfile.parse(current.get('modelfile', ''))
+            if config.find('FROM'):
+                config.set('FROM', model_name)
+            else:
+                config.instructions.insert(0, Instruction('FROM', model_name))
+            config.remove('ADAPTER')
 
-            # Add system prompt if provided
-            if system:
-                modelfile += f'SYSTEM """{system}"""\n'
+            # Only rewrite what changed, so equivalent spellings ('0.70' for
+            # 0.7) and whitespace the UI trimmed are kept as they were
+            for key, change in diff.get('parameters', {}).items():
+                config.set_parameter(key, change['new'])
+            if 'system' in diff:
+                config.set('SYSTEM', system)
+            if 'template' in diff:
+                config.set('TEMPLATE', template)
 
-            # Add template if provided    
-            if template:
-                modelfile += f'TEMPLATE """{template}"""\n'
+            modelfile = config.serialize()
 
-            print( gettext("Creating model with file: %s" % modelfile) )  # Debug log
+            print( gettext("Creating model with file: %s") % modelfile )  # Debug log
 
             # Create new model using Ollama API with streaming response handling
+            started = time.perf_counter()
             url = f'{self.base_url}/api/create'
             response = requests.post(
                 url,
@@ -116,39 +199,109 @@ class OllamaClient:
                     except json.JSONDecodeError:
                         continue
 
+            create_seconds = round(time.perf_counter() - started, 3)
+            metrics.observe_upstream('api/create', 'POST', response.status_code, create_seconds)
             if error:
-                return {'success': False, 'error': error}
+                metrics.UPSTREAM_ERRORS.inc('api/create', 'stream')
+                return {'success': False, 'error': error, 'diff': diff, 'timing': {'create_seconds': create_seconds}}
 
-            return {'success': True, 'message': gettext("Configuration for %s saved successfully" % model_name) }
+            self.invalidate_model(model_name)
+            return {
+                'success': True,
+                'changed': True,
+                'diff': diff,
+                'timing': {'create_seconds': create_seconds},
+                'message': gettext("Configuration for %s saved successfully") % model_name
+            }
 
         except requests.exceptions.RequestException as e:
+            metrics.UPSTREAM_ERRORS.inc('api/create', 'http')
             return {'success': False, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def save_model_configs(self, configs):
+        """Save several model configurations, fetching the model list once"""
+        digests = self._get_model_digests()
+        results = []
+        for entry in configs:
+            name = entry.get('name') if isinstance(entry, dict) else None
+            if not name:
+                results.append({'name': None, 'success': False, 'error': gettext("Model name is required")})
+                continue
+
+            result = self.save_model_config(
+                name,
+                system=entry.get('system'),
+                template=entry.get('template'),
+                parameters=entry.get('parameters'),
+                digests=digests
+            )
+            result['name'] = name
+            results.append(result)
+
+        return {
+            'results': results,
+            'changed': sum(1 for r in results if r.get('changed')),
+            'unchanged': sum(1 for r in results if r.get('success') and not r.get('changed')),
+            'failed': sum(1 for r in results if not r.get('success'))
+        }
+
+    def _get_model_digests(self):
+        """Map local model names to their digests, or None if unavailable"""
+        response = self._handle_request(requests.get, 'api/tags')
+        if 'error' in response:
+            return None
+        return {m['name']: m.get('digest') for m in response.get('models', [])}
+
+    def _get_cached_config(self, model_name, digests=None):
+        """Get a model's parsed config, reusing the cached copy for its digest"""
+        if digests is None:
+            digests = self._get_model_digests() or {}
+        digest = digests.get(model_name) or digests.get(f'{model_name}:latest')
+
+        if digest:
+            with _config_cache_lock:
+                if digest in _config_cache:
+                    _config_cache.move_to_end(digest)
+                    return _config_cache[digest]
+
+        config = self.get_model_config(model_name)
+        if digest and 'error' not in config:
+            with _config_cache_lock:
+                _config_cache[digest] = config
+                while len(_config_cache) > CONFIG_CACHE_SIZE:
+                    _config_cache.popitem(last=False)
+        return config
+
     def check_server(self):
         """Check if Ollama server is running with caching"""
         current_time = time.time()
         if self._server_status is not None and (current_time - self._last_check) < self._check_interval:
             return self._server_status
 
-        try:
-            if not self.base_url:
-                self._server_status = False
-                return False
+        if not self.base_url:
+            self._server_status = False
+            return False
 
+        self._server_status = _inflight.do(('check_server', self.base_url), self._probe_server)
+        self._last_check = current_time
+        return self._server_status
+
+    def _probe_server(self):
+        try:
+            started = time.perf_counter()
             response = requests.get(
                 f'{self.base_url}/api/tags',
                 headers=self._get_headers(),
                 timeout=5
             )
-            self._server_status = response.status_code == 200
+            metrics.observe_upstream('api/tags', 'GET', response.status_code, time.perf_counter() - started)
+            return response.status_code == 200
         except Exception as e:
-            print( gettext("Server check failed with error: %s" % str(e)) )
-            self._server_status = False
-
-        self._last_check = current_time
-        return self._server_status
+            metrics.UPSTREAM_ERRORS.inc('api/tags', 'connection')
+            print( gettext("Server check failed with error: %s") % str(e) )
+            return False
 
     def list_models(self):
         """List all available models with full details"""
@@ -172,6 +325,22 @@ class OllamaClient:
             return {'models': [], 'error': response['error']}
         return response
 
+    def probe_running(self, timeout=METRICS_PROBE_TIMEOUT):
+        """List running models with a single short request, for /metrics scrapes
+
+        Unlike list_running there are no retries, so a down or hung server
+        is reported within timeout seconds instead of holding the scrape.
+        """
+        started = time.perf_counter()
+        try:
+            response = requests.get(f'{self.base_url}/api/ps', headers=self._get_headers(), timeout=timeout)
+            metrics.observe_upstream('api/ps', 'GET', response.status_code, time.perf_counter() - started)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            metrics.UPSTREAM_ERRORS.inc('api/ps', 'probe')
+            return {'models': [], 'error': str(e)}
+
     def stop_model(self, model_name):
         """Stop a running model"""
         try:
@@ -181,7 +350,7 @@ class OllamaClient:
                 return {'success': False, 'error': running_models['error']}
 
             if not any(model['name'] == model_name for model in running_models.get('models', [])):
-                return {'success': True, 'message': gettext("The model %s is not running" % model_name)}
+                return {'success': True, 'message': gettext("The model %s is not running") % model_name}
 
             # Send stop command
             response = self._handle_request(
@@ -200,9 +369,9 @@ class OllamaClient:
                 return {'success': False, 'error': running_models['error']}
 
             if not any(model['name'] == model_name for model in running_models.get('models', [])):
-                return {'success': True, 'message': gettext("The model %s has been stopped successfully" % model_name)}
+                return {'success': True, 'message': gettext("The model %s has been stopped successfully") % model_name}
             else:
-                return {'success': False, 'error': gettext("Unable to stop model %s" % model_name)}
+                return {'success': False, 'error': gettext("Unable to stop model %s") % model_name}
 
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -216,10 +385,13 @@ class OllamaClient:
         )
         if 'error' in response:
             return {'success': False, 'error': response['error']}
-        return {'success': True, 'message': gettext("The model %s was successfully deleted" % model_name)}
+        self.invalidate_model(model_name)
+        return {'success': True, 'message': gettext("The model %s was successfully deleted") % model_name}
 
     def get_model_stats(self, model_name=None):
         """Get usage statistics for a specific model or all models"""
+        # Imported on first use so SQLAlchemy stays out of the startup path
+        from models import ModelUsage
         return ModelUsage.get_model_stats(model_name)
 
     def get_model_config(self, model_name):
@@ -233,52 +405,101 @@ class OllamaClient:
             if 'error' in response:
                 return {'error': response['error']}
 
+            modelfile = response.get('modelfile', '')
+            parsed = Modelfile.parse(modelfile)
             return {
-                'modelfile': response.get('modelfile', ''),
-                'parameters': self._extract_parameters(response.get('modelfile', '')),
-                'template': self._extract_template(response.get('modelfile', '')),
-                'system': self._extract_system(response.get('modelfile', ''))
+                'modelfile': modelfile,
+                'parameters': parsed.parameters,
+                'template': parsed.get('TEMPLATE', ''),
+                'system': parsed.get('SYSTEM', '')
             }
         except Exception as e:
             return {'error': str(e)}
 
-    def _extract_parameters(self, modelfile):
-        parameters = {}
-        for line in modelfile.split('\n'):
-            if line.startswith('PARAMETER'):
-                parts = line.split(' ', 2)
-                if len(parts) >= 3:
-                    key = parts[1]
-                    value = parts[2].strip('"')
-                    parameters[key] = value
-        return parameters
-
-    def _extract_template(self, modelfile):
-        start = modelfile.find('TEMPLATE')
-        if start == -1:
-            return ""
-
-        template_line = modelfile[start:].split('\n')[0]
-        template = template_line.split('"')[1] if '"' in template_line else ""
-        return template
-
-    def _extract_system(self, modelfile):
-        start = modelfile.find('SYSTEM')
-        if start == -1:
-            return ""
-
-        system_line = modelfile[start:].split('\n')[0]
-        system = system_line.split('SYSTEM', 1)[1].strip()
-        return system
+    def _show_model(self, model_name):
+        """Call /api/show, reusing a recent successful response"""
+        key = (self.base_url, normalize_model_name(model_name))
+        now = time.monotonic()
+        with _show_cache_lock:
+            cached = _show_cache.get(key)
+            if cached and cached[0] > now:
+                _show_cache.move_to_end(key)
+                return cached[1]
+            if cached:
+                del _show_cache[key]
+
+        response = self._handle_request(
+            requests.post,
+            'api/show',
+            json={'name': model_name}
+        )
+        if 'error' not in response:
+            with _show_cache_lock:
+                _show_cache[key] = (time.monotonic() + SHOW_CACHE_TTL, response)
+                _show_cache.move_to_end(key)
+                while len(_show_cache) > SHOW_CACHE_SIZE:
+                    _show_cache.popitem(last=False)
+        return response
+
+    def invalidate_model(self, model_name):
+        """Forget cached /api/show data after a model is changed or removed"""
+        with _show_cache_lock:
+            _show_cache.pop((self.base_url, normalize_model_name(model_name)), None)
+
+    def get_models_details(self, model_names):
+        """Get details and usage stats for several models in one call"""
+        model_names = list(dict.fromkeys(model_names))
+        if not model_names:
+            return {'models': []}
+
+        # Pool threads have no request context: give them this request's locale
+        locale = get_locale()
+
+        def show(name):
+            with force_locale(locale):
+                return self._show_model(name)
+
+        shows = dict(zip(model_names, _details_pool.map(show, model_names)))
+        from models import ModelUsage
+        stats = ModelUsage.get_stats_for_models(model_names)
+
+        models = []
+        for name in model_names:
+            show = shows[name]
+            if 'error' in show:
+                models.append({'name': name, 'error': show['error'], 'stats': stats[name]})
+                continue
+
+            details = show.get('details', {})
+            try:
+                parsed = Modelfile.parse(show.get('modelfile', ''))
+            except ValueError:
+                parsed = Modelfile()
+            parameters = parsed.parameters
+            context_length = next(
+                (v for k, v in show.get('model_info', {}).items() if k.endswith('.context_length')),
+                None
+            )
+
+            models.append({
+                'name': name,
+                'family': details.get('family'),
+                'format': details.get('format'),
+                'parameter_size': details.get('parameter_size'),
+                'quantization_level': details.get('quantization_level'),
+                'context_length': context_length,
+                'num_ctx': parameters.get('num_ctx'),
+                'template': show.get('template') or parsed.get('TEMPLATE', ''),
+                'parameters': parameters,
+                'modified_at': show.get('modified_at', ''),
+                'stats': stats[name]
+            })
+        return {'models': models}
 
     def get_model_details(self, model_name):
         """Get full model details including creation date"""
         try:
-            response = self._handle_request(
-                requests.post,
-                'api/show',
-                json={'name': model_name}
-            )
+            response = self._show_model(model_name)
             if 'error' in response:
                 return {'error': response['error']}
 
@@ -287,4 +508,84 @@ class OllamaClient:
                 'modified_at': response.get('modified_at', '')
             }
         except Exception as e:
-            return {'error': str(e)}
\ No newline at end of file
+            return {'error': str(e)}
+
+    def get_disk_usage(self, candidates=None, verify=False):
+        """Analyze disk usage and layer sharing across local models
+
+        verify hashes the blobs of the candidate models only, never the
+        whole models directory.
+        """
+        try:
+            if candidates is not None:
+                # Match the tagged names /api/tags reports, as delete and pull do
+                candidates = list(dict.fromkeys(normalize_model_name(name) for name in candidates))
+            if self.models_dir:
+                model_layers = disk_usage.scan_models_dir(self.models_dir)
+                result = disk_usage.analyze_usage(model_layers, candidates)
+                all_digests = {d for layers in model_layers.values() for d in layers}
+                verify_digests = set()
+                if verify and candidates:
+                    verify_digests = {d for name in candidates for d in model_layers.get(name, {})}
+                result.update(disk_usage.check_blobs(self.models_dir, all_digests, verify=verify_digests))
+                result['source'] = 'models_dir'
+                result['approximate'] = False
+                return result
+
+            model_layers = self._layers_from_api()
+            if 'error' in model_layers:
+                return model_layers
+            result = disk_usage.analyze_usage(model_layers, candidates)
+            result['source'] = 'api'
+            result['approximate'] = True
+            return result
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _layers_from_api(self):
+        """Approximate {model: {digest: size}} from /api/tags and /api/show
+
+        The API does not expose manifests, but the modelfile returned by
+        /api/show names the weights blob in its FROM line. Models sharing
+        that blob are charged the smallest reported size for it, and the
+        rest of each model's size is kept as a layer of its own.
+        """
+        response = self._handle_request(requests.get, 'api/tags')
+        if 'error' in response:
+            return {'error': response['error']}
+
+        models = response.get('models', [])
+        locale = get_locale()
+
+        def show(name):
+            with force_locale(locale):
+                return self._show_model(name)
+
+        shows = _details_pool.map(show, [model['name'] for model in models])
+
+        weights = {}
+        sizes = {}
+        for model, show in zip(models, shows):
+            name = model['name']
+            sizes[name] = int(model.get('size') or 0)
+            digest = None
+            if 'error' not in show:
+                try:
+                    parsed = Modelfile.parse(show.get('modelfile', ''))
+                    digest = disk_usage.digest_from_path(parsed.get('FROM'))
+                except ModelfileError:
+                    pass
+            weights[name] = digest or model.get('digest') or name
+
+        shared_size = {}
+        for name, digest in weights.items():
+            shared_size[digest] = min(shared_size.get(digest, sizes[name]), sizes[name])
+
+        model_layers = {}
+        for name, digest in weights.items():
+            layers = {digest: shared_size[digest]}
+            remainder = sizes[name] - shared_size[digest]
+            if remainder:
+                layers[f'{name}@rest'] = remainder
+            model_layers[name] = layers
+        return model_layers
@@ -0,0 +1,62 @@
+"""Coalesce identical concurrent calls into a single in-flight call"""
+import copy
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run fn once per key while callers with the same key wait for its result
+
+    The first caller for a key runs fn; callers arriving before it finishes
+    block and receive a deep copy of the same result (or the same exception),
+    so nobody can mutate the dict another caller is using. Results are not
+    cached: once the call completes the next caller starts a new one.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            self._release(key)
+            call.done.set()
+            raise
+
+        if self._release(key):
+            # Waiters copy from a private snapshot while the leader keeps the original
+            call.result = copy.deepcopy(result)
+        call.done.set()
+        return result
+
+    def _release(self, key):
+        """Remove the call so later callers start afresh; returns its waiter count"""
+        with self._lock:
+            return self._calls.pop(key).waiters
@@ -165,7 +165,8 @@ window.showModelConfig = async function(modelName) {
         const parametersContainer = document.getElementById('parameters');
         parametersContainer.innerHTML = '';
 
-        Object.entries(config.parameters || {}).forEach(([key, value]) => {
+        // Repeated parameters (e.g. several stop tokens) come back as arrays
+        Object.entries(config.parameters || {}).forEach(([key, values]) => [].concat(values).forEach(value => {
             parametersContainer.innerHTML += `
                 <div class="ui segment">
                     <div class="two fields">
@@ -178,7 +179,7 @@ window.showModelConfig = async function(modelName) {
                     </div>
                 </div>
             `;
-        });
+        }));
 
         $('#configModal').modal('show');
     } catch (error) {
@@ -527,47 +528,33 @@ function formatDate(dateStr) {
     }
 }
 
-async function refreshLocalModels() {
-    try {
-        const serverStatusResponse = await fetch('/api/server/status', {
-            headers: { 'X-Ollama-URL': ollamaUrl }
-        });
-        const serverStatus = await serverStatusResponse.json();
-
-        if (serverStatus.status !== 'running') {
-            const tbody = document.querySelector('#localModels tbody');
-            tbody.innerHTML = '<tr><td colspan="8" class="center aligned">'+gettext('Ollama server not connected')+'</td></tr>';
-            return;
-        }
-
-        const response = await fetch('/api/models', {
-            headers: { 'X-Ollama-URL': ollamaUrl }
-        });
-        if (!response.ok) {
-            const tbody = document.querySelector('#localModels tbody');
-            tbody.innerHTML = '<tr><td colspan="8" class="center aligned">'+gettext('Unable to retrieve models')+'</td></tr>';
-            return;
-        }
-
-        const data = await response.json();
-        const tbody = document.querySelector('#localModels tbody');
-
-        console.log('Received models data:', data.models); // Debug log
-
-        tbody.innerHTML = data.models.map(model => {
-            console.log('Processing model:', model.name, 'modified_at:', model.modified_at); // Debug log
-            const formattedDate = formatDate(model.modified_at);
-
-            return `
-            <tr>
+// Model tables (see model_table.js)
+// Models are cached client side; sorting and filtering work on the cache and
+// rows are updated by key, so a refresh only touches rows that changed.
+let localModelsCache = [];
+let runningModelsCache = [];
+let visibleLocalModels = [];
+const localModelsView = { filter: '', sortKey: 'name', sortDir: 1 };
+
+let localModelsTable = null;
+let runningModelsTable = null;
+
+function getLocalModelsTable() {
+    if (!localModelsTable) {
+        localModelsTable = createModelTable({
+            tbody: document.querySelector('#localModels tbody'),
+            scroller: document.getElementById('localModelsScroller'),
+            key: model => model.name,
+            signature: model => (selectedModels.has(model.name) ? '1' : '0') + JSON.stringify(model),
+            renderCells: model => `
                 <td class="collapsing">
                     <div class="ui fitted checkbox">
-                        <input type="checkbox" data-model-name="${model.name}" onchange="toggleModelSelection(this, '${model.name}')">
+                        <input type="checkbox" data-model-name="${model.name}" ${selectedModels.has(model.name) ? 'checked' : ''} onchange="toggleModelSelection(this, '${model.name}')">
                         <label></label>
                     </div>
                 </td>
                 <td>${model.name}</td>
-                <td>${formattedDate}</td>
+                <td>${formatDate(model.modified_at)}</td>
                 <td>${formatBytes(model.size)}</td>
                 <td>${model.details?.format || 'N/A'}</td>
                 <td>${model.details?.family || 'N/A'}</td>
@@ -585,9 +572,126 @@ async function refreshLocalModels() {
                         </button>
                     </div>
                 </td>
-            </tr>
-            `;
-        }).join('') || '<tr><td colspan="8" class="center aligned">'+gettext('No Models Installed')+'</td></tr>';
+            `
+        });
+    }
+    return localModelsTable;
+}
+
+function getRunningModelsTable() {
+    if (!runningModelsTable) {
+        runningModelsTable = createModelTable({
+            tbody: document.querySelector('#runningModels tbody'),
+            scroller: document.getElementById('runningModelsScroller'),
+            key: model => model.name,
+            signature: model => JSON.stringify(model),
+            renderCells: model => `
+                <td>${model.name}</td>
+                <td>${formatDate(model.modified_at)}</td>
+                <td>${formatBytes(model.size)}</td>
+                <td>${model.details?.format || 'N/A'}</td>
+                <td>${model.details?.family || 'N/A'}</td>
+                <td>${model.details?.parameter_size || 'N/A'}</td>
+                <td class="center aligned">
+                    <button class="ui red tiny button" onclick="stopModel('${model.name}')">
+                        <i class="stop icon"></i> `+gettext('Stop')+`
+                    </button>
+                </td>
+            `
+        });
+    }
+    return runningModelsTable;
+}
+
+const MODEL_SORT_VALUES = {
+    name: model => model.name.toLowerCase(),
+    modified_at: model => model.modified_at || '',
+    size: model => model.size || 0,
+    format: model => model.details?.format || '',
+    family: model => model.details?.family || '',
+    parameter_size: model => parseFloat(model.details?.parameter_size) || 0
+};
+
+// Apply the current filter and sort to the cached local models
+function renderLocalModels() {
+    const table = getLocalModelsTable();
+    visibleLocalModels = [];
+    if (!localModelsCache.length) {
+        table.showMessage('<tr><td colspan="8" class="center aligned">'+gettext('No Models Installed')+'</td></tr>');
+        return;
+    }
+
+    const filter = localModelsView.filter;
+    const sortValue = MODEL_SORT_VALUES[localModelsView.sortKey] || MODEL_SORT_VALUES.name;
+    const direction = localModelsView.sortDir;
+    visibleLocalModels = localModelsCache
+        .filter(model => !filter || [model.name, model.details?.family, model.details?.parameter_size]
+            .some(value => value && value.toLowerCase().includes(filter)))
+        .sort((a, b) => {
+            const left = sortValue(a);
+            const right = sortValue(b);
+            return (left < right ? -1 : left > right ? 1 : 0) * direction;
+        });
+
+    updateSelectAllCheckbox();
+    if (!visibleLocalModels.length) {
+        table.showMessage('<tr><td colspan="8" class="center aligned">'+gettext('No models found')+'</td></tr>');
+        return;
+    }
+    table.setItems(visibleLocalModels);
+}
+
+window.filterLocalModels = debounce(function(input) {
+    localModelsView.filter = input.value.trim().toLowerCase();
+    renderLocalModels();
+}, 150);
+
+window.sortLocalModels = function(sortKey) {
+    if (localModelsView.sortKey === sortKey) {
+        localModelsView.sortDir = -localModelsView.sortDir;
+    } else {
+        localModelsView.sortKey = sortKey;
+        localModelsView.sortDir = 1;
+    }
+    document.querySelectorAll('#localModels th[data-sort]').forEach(th => {
+        th.classList.toggle('sorted', th.dataset.sort === sortKey);
+        th.classList.toggle('ascending', th.dataset.sort === sortKey && localModelsView.sortDir === 1);
+        th.classList.toggle('descending', th.dataset.sort === sortKey && localModelsView.sortDir === -1);
+    });
+    renderLocalModels();
+};
+
+async function refreshLocalModels() {
+    try {
+        const serverStatusResponse = await fetch('/api/server/status', {
+            headers: { 'X-Ollama-URL': ollamaUrl }
+        });
+        const serverStatus = await serverStatusResponse.json();
+
+        if (serverStatus.status !== 'running') {
+            getLocalModelsTable().showMessage('<tr><td colspan="8" class="center aligned">'+gettext('Ollama server not connected')+'</td></tr>');
+            return;
+        }
+
+        const response = await fetch('/api/models', {
+            headers: { 'X-Ollama-URL': ollamaUrl }
+        });
+        if (!response.ok) {
+            getLocalModelsTable().showMessage('<tr><td colspan="8" class="center aligned">'+gettext('Unable to retrieve models')+'</td></tr>');
+            return;
+        }
+
+        const data = await response.json();
+        localModelsCache = data.models || [];
+
+        // Keep the selection of models that still exist
+        const names = new Set(localModelsCache.map(model => model.name));
+        selectedModels.forEach(name => {
+            if (!names.has(name)) selectedModels.delete(name);
+        });
+        updateCompareButton();
+
+        renderLocalModels();
     } catch (error) {
         console.error('Error refreshing local models:', error);
         showMessage(gettext('Error'), error.message, true);
@@ -602,8 +706,7 @@ async function refreshRunningModels() {
         const serverStatus = await serverStatusResponse.json();
 
         if (serverStatus.status !== 'running') {
-            const tbody = document.querySelector('#runningModels tbody');
-            tbody.innerHTML = '<tr><td colspan="7" class="center aligned">'+gettext('Ollama server not connected')+'</td></tr>';
+            getRunningModelsTable().showMessage('<tr><td colspan="7" class="center aligned">'+gettext('Ollama server not connected')+'</td></tr>');
             return;
         }
 
@@ -611,36 +714,18 @@ async function refreshRunningModels() {
             headers: { 'X-Ollama-URL': ollamaUrl }
         });
         if (!response.ok) {
-            const tbody = document.querySelector('#runningModels tbody');
-            tbody.innerHTML = '<tr><td colspan="7" class="center aligned">'+gettext('Unable to retrieve running models')+'</td></tr>';
+            getRunningModelsTable().showMessage('<tr><td colspan="7" class="center aligned">'+gettext('Unable to retrieve running models')+'</td></tr>');
             return;
         }
 
         const data = await response.json();
-        const tbody = document.querySelector('#runningModels tbody');
+        runningModelsCache = data.models || [];
 
-        console.log('Received running models data:', data.models); // Debug log
-
-        tbody.innerHTML = data.models.map(model => {
-            console.log('Processing running model:', model.name, 'modified_at:', model.modified_at); // Debug log
-            const formattedDate = formatDate(model.modified_at);
-
-            return `
-            <tr>
-                <td>${model.name}</td>
-                <td>${formattedDate}</td>
-                <td>${formatBytes(model.size)}</td>
-                <td>${model.details?.format || 'N/A'}</td>
-                <td>${model.details?.family || 'N/A'}</td>
-                <td>${model.details?.parameter_size || 'N/A'}</td>
-                <td class="center aligned">
-                    <button class="ui red tiny button" onclick="stopModel('${model.name}')">
-                        <i class="stop icon"></i> `+gettext('Stop')+`
-                    </button>
-                </td>
-            </tr>
-            `;
-        }).join('') || '<tr><td colspan="7" class="center aligned">'+gettext('No Models Running')+'</td></tr>';
+        if (!runningModelsCache.length) {
+            getRunningModelsTable().showMessage('<tr><td colspan="7" class="center aligned">'+gettext('No Models Running')+'</td></tr>');
+            return;
+        }
+        getRunningModelsTable().setItems(runningModelsCache);
     } catch (error) {
         console.error('Error refreshing running models:', error);
         showMessage(gettext('Error'), error.message, true);
@@ -703,77 +788,6 @@ window.toggleTheme = function() {
     }
 };
 
-// Toggle all model checkboxes
-window.selectAllModels = function() {
-    const checkboxes = document.querySelectorAll('#localModels tbody input[type="checkbox"]');
-    const masterCheckbox = document.querySelector('#localModels thead input[type="checkbox"]');
-    // const isChecked = masterCheckbox.checked;
-
-    masterCheckbox.checked = true; // !isChecked;
-    checkboxes.forEach(checkbox => {
-        checkbox.checked = true; // !isChecked;
-    });
-};
-
-// Compare selected models
-window.compareSelectedModels = function() {
-    const selectedCheckboxes = document.querySelectorAll('#localModels tbody input[type="checkbox"]:checked');
-    const selectedModels = Array.from(selectedCheckboxes).map(checkbox => checkbox.dataset.modelName);
-
-    if (selectedModels.length < 2) {
-        let errorMessage = gettext('Please select at least two models to compare')
-        showMessage(gettext('Error'), errorMessage, true);
-        return;
-    }
-
-    // Populate comparison modal
-    const comparisonContainer = document.getElementById('modelComparison');
-    comparisonContainer.innerHTML = selectedModels.map(model => `
-        <div class="eight wide column">
-            <div class="ui segment">
-                <h3 class="ui header">${model}</h3>
-                <div class="ui list model-details" id="details-${model}">
-                    <div class="item">`+gettext('Loading details...')+`</div>
-                </div>
-            </div>
-        </div>
-    `).join('');
-
-    // Show the modal
-    $('#comparisonModal').modal('show');
-
-    // Fetch and display details for each model
-    selectedModels.forEach(async (model) => {
-        try {
-            const response = await fetch(`/api/models/${model}/details`, {
-                headers: { 'X-Ollama-URL': ollamaUrl }
-            });
-            const details = await response.json();
-
-            document.getElementById(`details-${model}`).innerHTML = `
-                <div class="item">
-                    <div class="header">Format</div>
-                    <div class="description">${details.format || 'N/A'}</div>
-                </div>
-                <div class="item">
-                    <div class="header">Famille</div>
-                    <div class="description">${details.family || 'N/A'}</div>
-                </div>
-                <div class="item">
-                    <div class="header">Taille des paramètres</div>
-                    <div class="description">${details.parameter_size || 'N/A'}</div>
-                </div>
-            `;
-        } catch (error) {
-            document.getElementById(`details-${model}`).innerHTML = `
-                <div class="item error-message">
-                    `+gettext('Error loading details')+`: ${error.message}
-                </div>
-            `;
-        }
-    });
-};
-
 // Format bytes to human readable size
 function formatBytes(bytes, decimals = 2) {
     if (bytes === 0) return '0 Bytes';
@@ -852,25 +866,22 @@ document.addEventListener('DOMContentLoaded', function() {
 // Batch operations
 let selectedModels = new Set();
 
-window.selectAllModels = function(checkbox) {
-    const checkboxes = document.querySelectorAll('#localModels tbody input[type="checkbox"]');
-    const isChecked = checkbox.checked;
+// Select or clear every model matching the current filter
+window.toggleAllModels = function() {
+    const names = visibleLocalModels.map(model => model.name);
+    const allSelected = names.length > 0 && names.every(name => selectedModels.has(name));
 
-    selectedModels.clear(); // Réinitialiser la sélection
-
-    checkboxes.forEach(cb => {
-        cb.checked = isChecked;
-        const modelName = cb.getAttribute('data-model-name');
-        if (isChecked) {
-            selectedModels.add(modelName);
+    names.forEach(name => {
+        if (allSelected) {
+            selectedModels.delete(name);
         } else {
-            selectedModels.delete(modelName);
-            // Uncheck the “Select All” box if a template is unchecked
-            // Décocher la case "Tous Sélectionner" si un modèle est décoché
-            document.querySelector('#selectAllCheckbox').checked = false;
+            selectedModels.add(name);
         }
     });
 
+    // Row signatures include the selection, so only changed rows are redrawn
+    getLocalModelsTable().render();
+    updateSelectAllCheckbox();
     updateCompareButton();
 };
 
@@ -879,12 +890,19 @@ window.toggleModelSelection = function(checkbox, modelName) {
         selectedModels.add(modelName);
     } else {
         selectedModels.delete(modelName);
-        // Décocher la case "Tous Sélectionner" si un modèle est décoché
-        document.querySelector('#selectAllCheckbox').checked = false;
     }
+    updateSelectAllCheckbox();
     updateCompareButton();
 };
 
+function updateSelectAllCheckbox() {
+    const masterCheckbox = document.querySelector('#localModels thead input[type="checkbox"]');
+    if (masterCheckbox) {
+        masterCheckbox.checked = visibleLocalModels.length > 0
+            && visibleLocalModels.every(model => selectedModels.has(model.name));
+    }
+}
+
 function updateCompareButton() {
     const compareButton = document.querySelector('#compareButton');
     if (compareButton) {
@@ -900,67 +918,95 @@ window.compareSelectedModels = async function() {
     }
 
     try {
-        const modelsArray = Array.from(selectedModels);
-        const comparisons = [];
-
-        for (let i = 0; i < modelsArray.length; i++) {
-            const modelStats = await fetch(`/api/models/${modelsArray[i]}/stats`, {
-                headers: { 'X-Ollama-URL': ollamaUrl }
-            }).then(res => res.json());
-
-            comparisons.push({
-                name: modelsArray[i],
-                stats: modelStats
-            });
+        // One round trip for the details and usage stats of every model
+        const response = await fetch('/api/models/details', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Ollama-URL': ollamaUrl
+            },
+            body: JSON.stringify({ models: Array.from(selectedModels) })
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || gettext('Error loading details'));
         }
 
         const comparisonContent = document.getElementById('modelComparison');
-        comparisonContent.innerHTML = comparisons.map(model => `
-            <div class="ui segment">
-                <h3 class="ui header">${model.name}</h3>
-                <div class="ui statistics tiny">
-                    <div class="statistic">
-                        <div class="value">${model.stats.total_operations || 0}</div>
-                        <div class="label">`+gettext('Total Operations')+`</div>
-                    </div>
-                    <div class="statistic">
-                        <div class="value">${model.stats.total_prompt_tokens || 0}</div>
-                        <div class="label">`+gettext('Total Prompt Tokens')+`</div>
-                    </div>
-                    <div class="statistic">
-                        <div class="value">${model.stats.total_completion_tokens || 0}</div>
-                        <div class="label">`+gettext('Total Completion Tokens')+`</div>
-                    </div>
-                    <div class="statistic">
-                        <div class="value">${(model.stats.total_duration || 0).toFixed(2)}s</div>
-                        <div class="label">`+gettext('Total Duration')+`</div>
+        comparisonContent.innerHTML = data.models.map(model => `
+            <div class="eight wide column">
+                <div class="ui segment">
+                    <h3 class="ui header">${model.name}</h3>
+                    ${model.error ? `
+                        <div class="ui negative message">`+gettext('Error loading details')+`: ${model.error}</div>
+                    ` : `
+                        <div class="ui list model-details">
+                            <div class="item">
+                                <div class="header">`+gettext('Format')+`</div>
+                                <div class="description">${model.format || 'N/A'}</div>
+                            </div>
+                            <div class="item">
+                                <div class="header">`+gettext('Family')+`</div>
+                                <div class="description">${model.family || 'N/A'}</div>
+                            </div>
+                            <div class="item">
+                                <div class="header">`+gettext('Parameters')+`</div>
+                                <div class="description">${model.parameter_size || 'N/A'}</div>
+                            </div>
+                            <div class="item">
+                                <div class="header">`+gettext('Quantization')+`</div>
+                                <div class="description">${model.quantization_level || 'N/A'}</div>
+                            </div>
+                            <div class="item">
+                                <div class="header">`+gettext('Context Length')+`</div>
+                                <div class="description">${model.num_ctx || model.context_length || 'N/A'}</div>
+                            </div>
+                        </div>
+                    `}
+                    <div class="ui statistics tiny">
+                        <div class="statistic">
+                            <div class="value">${model.stats.total_operations || 0}</div>
+                            <div class="label">`+gettext('Total Operations')+`</div>
+                        </div>
+                        <div class="statistic">
+                            <div class="value">${model.stats.total_prompt_tokens || 0}</div>
+                            <div class="label">`+gettext('Total Prompt Tokens')+`</div>
+                        </div>
+                        <div class="statistic">
+                            <div class="value">${model.stats.total_completion_tokens || 0}</div>
+                            <div class="label">`+gettext('Total Completion Tokens')+`</div>
+                        </div>
+                        <div class="statistic">
+                            <div class="value">${(model.stats.total_duration || 0).toFixed(2)}s</div>
+                            <div class="label">`+gettext('Total Duration')+`</div>
+                        </div>
                     </div>
                 </div>
             </div>
         `).join('');
 
-        $('#compareModal').modal('show');
+        $('#comparisonModal').modal('show');
     } catch (error) {
         showMessage(gettext('Error'), error.message, true);
     }
 };
 
 window.batchDeleteModels = async function() {
-    const selectedModels = document.querySelectorAll('input[type="checkbox"]:checked');
-    if (selectedModels.length === 0) {
+    // Selection is tracked in the set, rows outside the rendered window included
+    const modelNames = Array.from(selectedModels);
+    if (modelNames.length === 0) {
         showMessage(gettext('Error'), gettext('Please select at least one model'), true);
         return;
     }
 
     let confirmText = gettext('Are you sure you want to delete');
     let confirmText2 = gettext('model(s)');
-    if (!confirm(confirmText+` ${selectedModels.length} `+confirmText2+`?`)) {
+    if (!confirm(confirmText+` ${modelNames.length} `+confirmText2+`?`)) {
         return;
     }
 
     const results = [];
-    for (const checkbox of selectedModels) {
-        const modelName = checkbox.getAttribute('data-model-name');
+    for (const modelName of modelNames) {
         try {
             const response = await fetch('/api/models/delete', {
                 method: 'POST',
@@ -1002,19 +1048,6 @@ window.batchDeleteModels = async function() {
     refreshAll();
 };
 
-// Utility functions
-function formatBytes(bytes, decimals = 2) {
-    if (bytes === 0) return '0 Bytes';
-
-    const k = 1024;
-    const dm = decimals < 0 ? 0 : decimals;
-    const sizes = ['Bytes', 'KB', 'MB', 'GB','TB'];
-
-    const i = Math.floor(Math.log(bytes) / Math.log(k));
-
-    return parseFloat((bytes / Math.pow(k, i)).toFixed(dm)) + ' ' + sizes[i];
-}
-
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     const savedTheme = localStorage.getItem('theme') || 'light';
@@ -1127,7 +1160,10 @@ window.saveModelConfig = async function() {
         const keyInput = segment.querySelector('.parameter-key');
         const valueInput = segment.querySelector('.parameter-value');
         if (keyInput && valueInput && keyInput.value.trim()) {
-            parameters[keyInput.value.trim()] = valueInput.value.trim();
+            const key = keyInput.value.trim();
+            const value = valueInput.value.trim();
+            // Keep every value of a repeated parameter such as stop
+            parameters[key] = key in parameters ? [].concat(parameters[key], value) : value;
         }
     });
 
@@ -1138,6 +1174,12 @@ window.saveModelConfig = async function() {
         parameters: parameters
     };
 
+    // Several models are saved with a single batch call
+    if (modelItems.length > 1) {
+        const modelNames = Array.from(modelItems).map(item => item.textContent.trim());
+        return saveModelConfigs(modelNames, config);
+    }
+
     try {
         const response = await fetch(`/api/models/${modelName}/config`, {
             method: 'POST',
@@ -1155,6 +1197,10 @@ window.saveModelConfig = async function() {
         }
 
         $('#configModal').modal('hide');
+        if (data.changed === false) {
+            showMessage(gettext('Success'), gettext('No changes to save for') + ` ${modelName}`);
+            return;
+        }
         showMessage(gettext('Success'), gettext('Model configuration') +` ${modelName} `+ gettext('saved successfully'));
         refreshAll();
     } catch (error) {
@@ -1162,6 +1208,63 @@ window.saveModelConfig = async function() {
     }
 };
 
+// Open the config modal for every checked model
+window.batchConfigureModels = function() {
+    const modelNames = Array.from(selectedModels);
+    if (modelNames.length === 0) {
+        showMessage(gettext('Error'), gettext('Please select at least one model'), true);
+        return;
+    }
+
+    document.getElementById('selectedModels').innerHTML = modelNames.map(name => `
+        <div class="item">
+            <i class="cube icon"></i>
+            ${name}
+        </div>
+    `).join('');
+    document.getElementById('systemPrompt').value = '';
+    document.getElementById('template').value = '';
+    document.getElementById('parameters').innerHTML = '';
+
+    $('#configModal').modal('show');
+};
+
+async function saveModelConfigs(modelNames, config) {
+    try {
+        const response = await fetch('/api/models/config/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Ollama-URL': ollamaUrl
+            },
+            body: JSON.stringify({
+                models: modelNames.map(name => ({ name, ...config }))
+            })
+        });
+
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || gettext('Failed to save the configuration'));
+        }
+
+        $('#configModal').modal('hide');
+        document.getElementById('batchResults').innerHTML = data.results.map(result => `
+            <div class="ui message ${result.success ? 'positive' : 'negative'}">
+                <div class="header">${result.name}</div>
+                <p>${result.success
+                    ? (result.changed ? gettext('saved successfully') + ` (${result.timing.create_seconds}s)` : gettext('No changes to save'))
+                    : result.error}</p>
+            </div>
+        `).join('');
+        $('#batchResultsModal').modal('show');
+        if (data.changed) {
+            refreshAll();
+        }
+    } catch (error) {
+        showMessage(gettext('Error'), error.message, true);
+    }
+}
+
 // Server status check interval
 setInterval(checkServerStatus, 30000);
 
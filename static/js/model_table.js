@@ -0,0 +1,115 @@
+// Keyed, virtualized table bodies for the model lists
+// A table keeps one <tr> per item key and only re-renders the rows whose
+// signature changed. Above VIRTUAL_ROW_THRESHOLD items only the rows in the
+// scroller's viewport (plus overscan) are in the DOM.
+const VIRTUAL_ROW_THRESHOLD = 200;  // larger lists only render the visible rows
+const VIRTUAL_OVERSCAN = 20;
+const DEFAULT_ROW_HEIGHT = 41;
+
+// Stands in for the rows outside the rendered window; the height is set on
+// the cell because browsers size an empty row inconsistently
+function createSpacer(columns) {
+    const tr = document.createElement('tr');
+    tr.className = 'virtual-spacer';
+    const td = document.createElement('td');
+    td.colSpan = columns;
+    tr.appendChild(td);
+    return tr;
+}
+
+function createModelTable({ tbody, scroller, key, signature, renderCells }) {
+    const rows = new Map();  // key -> { tr, signature }
+    const columns = tbody.closest('table').querySelectorAll('thead th').length || 1;
+    const topSpacer = createSpacer(columns);
+    const bottomSpacer = createSpacer(columns);
+    let items = [];
+    let rowHeight = 0;
+    let framePending = false;
+
+    function rowFor(model) {
+        const rowKey = key(model);
+        const rowSignature = signature(model);
+        let entry = rows.get(rowKey);
+        if (!entry) {
+            entry = { tr: document.createElement('tr'), signature: null };
+            entry.tr.dataset.key = rowKey;
+            rows.set(rowKey, entry);
+        }
+        if (entry.signature !== rowSignature) {
+            entry.tr.innerHTML = renderCells(model);
+            entry.signature = rowSignature;
+        }
+        return entry.tr;
+    }
+
+    function render() {
+        framePending = false;
+        let start = 0;
+        let end = items.length;
+        const virtual = scroller && items.length > VIRTUAL_ROW_THRESHOLD;
+        if (virtual) {
+            const height = rowHeight || DEFAULT_ROW_HEIGHT;
+            start = Math.max(0, Math.floor(scroller.scrollTop / height) - VIRTUAL_OVERSCAN);
+            end = Math.min(items.length, Math.ceil((scroller.scrollTop + scroller.clientHeight) / height) + VIRTUAL_OVERSCAN);
+            topSpacer.firstChild.style.height = `${start * height}px`;
+            bottomSpacer.firstChild.style.height = `${(items.length - end) * height}px`;
+        }
+
+        const wanted = [];
+        if (virtual) wanted.push(topSpacer);
+        for (let i = start; i < end; i++) {
+            wanted.push(rowFor(items[i]));
+        }
+        if (virtual) wanted.push(bottomSpacer);
+
+        // Move rows into place, leaving rows that are already in order alone
+        let current = tbody.firstChild;
+        for (const node of wanted) {
+            if (node === current) {
+                current = current.nextSibling;
+            } else {
+                tbody.insertBefore(node, current);
+            }
+        }
+        while (current) {
+            const next = current.nextSibling;
+            tbody.removeChild(current);
+            current = next;
+        }
+
+        if (virtual && !rowHeight && end > start) {
+            rowHeight = wanted[1].offsetHeight || DEFAULT_ROW_HEIGHT;
+        }
+    }
+
+    if (scroller) {
+        scroller.addEventListener('scroll', () => {
+            if (!framePending && items.length > VIRTUAL_ROW_THRESHOLD) {
+                framePending = true;
+                requestAnimationFrame(render);
+            }
+        });
+    }
+
+    return {
+        setItems(newItems) {
+            items = newItems;
+            // Forget rows of models that are gone, including renamed ones
+            const keys = new Set(items.map(key));
+            for (const rowKey of rows.keys()) {
+                if (!keys.has(rowKey)) rows.delete(rowKey);
+            }
+            render();
+        },
+        render,
+        // Rows kept for reuse; never more than the items currently set
+        get size() {
+            return rows.size;
+        },
+        showMessage(html) {
+            items = [];
+            rows.clear();
+            tbody.innerHTML = html;
+        }
+    };
+}
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The application modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep usage statistics written during tests out of the working directory
+os.environ.setdefault('STATS_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'stats.db'))
+
+
+class FakeOllama:
+    """Threaded stand-in for the Ollama HTTP API that records every request
+
+    models maps a model name to the modelfile /api/show returns for it.
+    delay slows down every response, so concurrent callers overlap.
+    """
+
+    def __init__(self, models=None, delay=0):
+        self.models = dict(models or {})
+        self.running = []
+        self.delay = delay
+        self.requests = []
+        self.created = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, method, path, name=None):
+        with self._lock:
+            return sum(
+                1 for m, p, body in self.requests
+                if m == method and p == path and (name is None or body.get('name') == name)
+            )
+
+    def _record(self, method, path, body):
+        with self._lock:
+            self.requests.append((method, path, body))
+
+    def _respond(self, method, path, body):
+        if path == '/api/tags':
+            return 200, {'models': [
+                {'name': name, 'digest': f'digest-{name}', 'size': 100, 'details': {}}
+                for name in self.models
+            ]}
+        if path == '/api/ps':
+            return 200, {'models': [{'name': name} for name in self.running]}
+        if path == '/api/show':
+            name = body.get('name')
+            if name not in self.models:
+                return 404, {'error': f"model '{name}' not found"}
+            return 200, {'modelfile': self.models[name], 'details': {'family': 'llama'}}
+        if path == '/api/create':
+            self.created[body.get('name')] = body.get('modelfile')
+            return 200, {'status': 'success'}
+        if path == '/api/pull':
+            return 200, {'status': 'success'}
+        if path == '/api/delete':
+            self.models.pop(body.get('name'), None)
+            return 200, {}
+        return 404, {'error': 'not found'}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                fake._record(self.command, self.path, body)
+                if fake.delay:
+                    time.sleep(fake.delay)
+                status, payload = fake._respond(self.command, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _handle
+
+        return Handler
+
+
+@pytest.fixture
+def fake_ollama():
+    server = FakeOllama().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def _clear_client_caches():
+    """Module level caches would otherwise leak between tests on reused ports"""
+    import ollama_client
+    ollama_client._config_cache.clear()
+    ollama_client._show_cache.clear()
+    yield
@@ -0,0 +1,110 @@
+// Just enough DOM for static/js/model_table.js when jsdom is not installed.
+// Nodes are doubly linked like the real DOM, so moving a row is O(1). The
+// innerHTML setter only stores the string: rows are counted and pruned like
+// in a browser, but rendering cost is not, so the shim is never timed.
+class Element {
+    constructor(tagName) {
+        this.tagName = tagName.toUpperCase();
+        this.parentNode = null;
+        this.firstChild = null;
+        this.lastChild = null;
+        this.nextSibling = null;
+        this.previousSibling = null;
+        this.className = '';
+        this.style = {};
+        this.dataset = {};
+        this.colSpan = 1;
+        this.listeners = {};
+        this._html = '';
+        Element.created++;
+    }
+
+    get childNodes() {
+        const nodes = [];
+        for (let node = this.firstChild; node; node = node.nextSibling) nodes.push(node);
+        return nodes;
+    }
+
+    get offsetHeight() {
+        return this.tagName === 'TR' ? 41 : 0;
+    }
+
+    get innerHTML() {
+        return this._html;
+    }
+
+    set innerHTML(html) {
+        while (this.firstChild) this.removeChild(this.firstChild);
+        this._html = html;
+    }
+
+    appendChild(node) {
+        return this.insertBefore(node, null);
+    }
+
+    insertBefore(node, reference) {
+        if (node.parentNode) node.parentNode.removeChild(node);
+        node.parentNode = this;
+        node.nextSibling = reference;
+        node.previousSibling = reference ? reference.previousSibling : this.lastChild;
+        if (node.previousSibling) node.previousSibling.nextSibling = node;
+        else this.firstChild = node;
+        if (reference) reference.previousSibling = node;
+        else this.lastChild = node;
+        return node;
+    }
+
+    removeChild(node) {
+        if (node.previousSibling) node.previousSibling.nextSibling = node.nextSibling;
+        else this.firstChild = node.nextSibling;
+        if (node.nextSibling) node.nextSibling.previousSibling = node.previousSibling;
+        else this.lastChild = node.previousSibling;
+        node.parentNode = node.nextSibling = node.previousSibling = null;
+        return node;
+    }
+
+    closest(tagName) {
+        for (let node = this; node; node = node.parentNode) {
+            if (node.tagName === tagName.toUpperCase()) return node;
+        }
+        return null;
+    }
+
+    // Only descendant selectors made of tag names, e.g. 'thead th'
+    querySelectorAll(selector) {
+        let matches = [this];
+        for (const tag of selector.trim().split(/\s+/)) {
+            const found = [];
+            for (const root of matches) collect(root, tag.toUpperCase(), found);
+            matches = found;
+        }
+        return matches;
+    }
+
+    querySelector(selector) {
+        return this.querySelectorAll(selector)[0] || null;
+    }
+
+    addEventListener(type, listener) {
+        (this.listeners[type] = this.listeners[type] || []).push(listener);
+    }
+
+    dispatchEvent(event) {
+        for (const listener of this.listeners[event.type] || []) listener(event);
+    }
+}
+Element.created = 0;
+
+function collect(root, tagName, found) {
+    for (let node = root.firstChild; node; node = node.nextSibling) {
+        if (node.tagName === tagName) found.push(node);
+        collect(node, tagName, found);
+    }
+}
+
+function createWindow() {
+    const document = { createElement: tagName => new Element(tagName) };
+    return { document, Event: class { constructor(type) { this.type = type; } } };
+}
+
+module.exports = { createWindow, Element };
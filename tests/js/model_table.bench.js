@@ -0,0 +1,146 @@
+// Benchmark and checks for static/js/model_table.js with 1k and 10k rows.
+//
+//     node tests/js/model_table.bench.js
+//
+// The checks on how many rows are rendered and kept fail the run with a
+// non-zero exit code. Render timings are only measured with jsdom (npm
+// install in tests/js): without it the checks run against the small DOM in
+// dom_shim.js, which does not parse innerHTML and so cannot be timed.
+const assert = require('assert');
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const SOURCE = path.join(__dirname, '..', '..', 'static', 'js', 'model_table.js');
+const COLUMNS = 8;
+const VIEWPORT = 600;
+
+function createWindow() {
+    try {
+        const { JSDOM } = require('jsdom');
+        return { window: new JSDOM('<!DOCTYPE html>').window, dom: 'jsdom' };
+    } catch (e) {
+        return { window: require('./dom_shim').createWindow(), dom: 'dom_shim' };
+    }
+}
+
+function loadTable(window) {
+    const context = vm.createContext({
+        document: window.document,
+        requestAnimationFrame: callback => callback(),
+    });
+    vm.runInContext(fs.readFileSync(SOURCE, 'utf8'), context, { filename: SOURCE });
+    return context;
+}
+
+function buildTable(document) {
+    const scroller = document.createElement('div');
+    const table = document.createElement('table');
+    const thead = document.createElement('thead');
+    const headRow = document.createElement('tr');
+    for (let i = 0; i < COLUMNS; i++) headRow.appendChild(document.createElement('th'));
+    thead.appendChild(headRow);
+    const tbody = document.createElement('tbody');
+    table.appendChild(thead);
+    table.appendChild(tbody);
+    scroller.appendChild(table);
+
+    // Layout does not exist in either DOM: drive scrolling by hand
+    let scrollTop = 0;
+    Object.defineProperty(scroller, 'clientHeight', { get: () => VIEWPORT });
+    Object.defineProperty(scroller, 'scrollTop', { get: () => scrollTop, set: value => { scrollTop = value; } });
+    return { scroller, tbody };
+}
+
+function models(count, prefix = 'model') {
+    return Array.from({ length: count }, (_, i) => ({
+        name: `${prefix}-${String(i).padStart(5, '0')}:latest`,
+        size: 1000 + i,
+        details: { family: 'llama', format: 'gguf', parameter_size: '8B' },
+    }));
+}
+
+function time(fn) {
+    const started = process.hrtime.bigint();
+    fn();
+    return Number(process.hrtime.bigint() - started) / 1e6;
+}
+
+function rowCount(tbody) {
+    let rows = 0;
+    for (let node = tbody.firstChild; node; node = node.nextSibling) {
+        if (node.className !== 'virtual-spacer') rows++;
+    }
+    return rows;
+}
+
+function run(window, count) {
+    const context = loadTable(window);
+    const { scroller, tbody } = buildTable(window.document);
+    let rendered = 0;
+    const table = context.createModelTable({
+        tbody,
+        scroller,
+        key: model => model.name,
+        signature: model => JSON.stringify(model),
+        renderCells: model => {
+            rendered++;
+            return `<td>${model.name}</td><td>${model.size}</td>`;
+        },
+    });
+    // Top level consts are not properties of the context's global object
+    const [rowHeight, overscan] = vm.runInContext('[DEFAULT_ROW_HEIGHT, VIRTUAL_OVERSCAN]', context);
+    const windowRows = Math.ceil(VIEWPORT / rowHeight) + 2 * overscan;
+    const results = {};
+
+    let items = models(count);
+    results.initial = time(() => table.setItems(items));
+    assert.ok(rowCount(tbody) <= windowRows, `rendered ${rowCount(tbody)} rows for a ${windowRows} row window`);
+    const spacer = tbody.lastChild;
+    assert.strictEqual(spacer.className, 'virtual-spacer');
+    assert.strictEqual(spacer.firstChild.colSpan, COLUMNS);
+    assert.ok(parseInt(spacer.firstChild.style.height, 10) > 0, 'spacer height is set on its cell');
+
+    rendered = 0;
+    items = models(count);
+    results.unchanged = time(() => table.setItems(items));
+    assert.strictEqual(rendered, 0, 'an unchanged refresh re-renders no rows');
+
+    rendered = 0;
+    items = items.slice();
+    items[0] = { ...items[0], size: 1 };
+    results.oneChanged = time(() => table.setItems(items));
+    assert.strictEqual(rendered, 1, 'a refresh with one changed model re-renders one row');
+
+    rendered = 0;
+    results.scroll = time(() => {
+        for (let top = 0; top < count * rowHeight; top += VIEWPORT * 5) {
+            scroller.scrollTop = top;
+            scroller.dispatchEvent(new window.Event('scroll'));
+        }
+    });
+    assert.ok(rowCount(tbody) <= windowRows);
+
+    // Same count, different names: rows of the old names must be dropped
+    scroller.scrollTop = 0;
+    items = models(count, 'renamed');
+    results.renamed = time(() => table.setItems(items));
+    assert.ok(table.size <= windowRows, `${table.size} rows kept after renaming every model`);
+    table.setItems([]);
+    assert.strictEqual(rowCount(tbody), 0);
+    assert.strictEqual(table.size, 0);
+
+    return results;
+}
+
+const { window, dom } = createWindow();
+if (dom === 'jsdom') {
+    console.log('model_table.js benchmark (jsdom)');
+} else {
+    console.log('model_table.js row checks (dom_shim, install jsdom for render timings)');
+}
+for (const count of [1000, 10000]) {
+    const results = run(window, count);
+    const line = Object.entries(results).map(([name, ms]) => `${name} ${ms.toFixed(1)} ms`).join(', ');
+    console.log(`  ${count} rows: ${dom === 'jsdom' ? line : 'checks passed'}`);
+}
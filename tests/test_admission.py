@@ -0,0 +1,111 @@
+import pytest
+
+import admission
+from admission import normalize_upstream
+from app import admission_control, create_app
+
+
+@pytest.fixture
+def client(fake_ollama):
+    fake_ollama.models['llama3:latest'] = 'FROM llama3\n'
+    admission_control._buckets.clear()
+    admission_control._gates.clear()
+    app = create_app({'TESTING': True, 'ADMISSION_CONTROL': True})
+    test_client = app.test_client()
+    test_client.environ_base['HTTP_X_OLLAMA_URL'] = fake_ollama.url
+    yield test_client
+    admission_control._buckets.clear()
+    admission_control._gates.clear()
+
+
+def _tokens(operation, client='127.0.0.1'):
+    return admission_control._buckets[(client, operation)].tokens
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('http://localhost:11434', 'http://127.0.0.1:11434'),
+    ('HTTP://LocalHost:11434/', 'http://127.0.0.1:11434'),
+    ('127.0.0.1:11434', 'http://127.0.0.1:11434'),
+    ('http://[::1]:11434', 'http://127.0.0.1:11434'),
+    ('http://Ollama.Example.com', 'http://ollama.example.com:80'),
+    ('https://ollama.example.com/', 'https://ollama.example.com:443'),
+])
+def test_normalize_upstream(url, expected):
+    assert normalize_upstream(url) == expected
+
+
+def test_pulls_are_rate_limited_per_client(client):
+    statuses = [client.post('/api/models/pull', json={'name': 'llama3'}).status_code for _ in range(3)]
+    limited = client.post('/api/models/pull', json={'name': 'llama3'})
+    other = client.post('/api/models/pull', json={'name': 'llama3'}, environ_base={'REMOTE_ADDR': '10.0.0.2'})
+
+    assert statuses == [200, 200, 200]
+    assert limited.status_code == 429
+    assert limited.get_json()['status'] == 'rate_limited'
+    assert 25 <= int(limited.headers['Retry-After']) <= 30
+    assert other.status_code == 200
+
+
+def test_oversized_batches_are_rejected_without_charge(client):
+    configs = [{'name': 'llama3:latest', 'parameters': {'temperature': 0.5}}]
+
+    too_large = client.post('/api/models/config/batch', json={'models': configs * 21})
+    fits = client.post('/api/models/config/batch', json={'models': configs * 20})
+
+    assert too_large.status_code == 413
+    assert too_large.get_json()['status'] == 'too_large'
+    assert fits.status_code == 200
+    assert _tokens('config') < 1
+
+
+def test_validation_errors_do_not_drain_the_bucket(client):
+    for _ in range(15):
+        assert client.post('/api/models/delete', json={}).status_code == 400
+
+    assert client.post('/api/models/delete', json={'name': 'llama3:latest'}).status_code == 200
+    assert _tokens('delete') == pytest.approx(9, abs=0.5)
+
+
+def test_busy_server_answers_503_and_refunds(client, fake_ollama):
+    gate = admission_control._gate(fake_ollama.url)
+    gate.max_queue = 0
+    for _ in range(gate.limit):
+        gate.acquire(bulk=False)
+    try:
+        response = client.post('/api/models/delete', json={'name': 'llama3:latest'})
+    finally:
+        for _ in range(gate.limit):
+            gate.release(bulk=False)
+        admission_control._release_gate(gate)
+
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'server_busy'
+    assert int(response.headers['Retry-After']) > 0
+    assert _tokens('delete') == pytest.approx(10)
+
+
+def test_spellings_of_one_server_share_a_gate(client, fake_ollama):
+    port = fake_ollama.url.rsplit(':', 1)[1]
+    for url in (f'http://localhost:{port}', f'http://LOCALHOST:{port}/', f'localhost:{port}'):
+        client.post('/api/models/delete', json={'name': 'llama3:latest'}, headers={'X-Ollama-URL': url})
+
+    assert list(admission_control._gates) == [f'http://127.0.0.1:{port}']
+
+
+def test_gates_are_bounded(client, monkeypatch):
+    monkeypatch.setattr(admission, 'MAX_UPSTREAMS', 2)
+    for port in range(1, 6):
+        # Rejected by validation inside the route, after a gate was handed out
+        client.post('/api/models/delete', json={}, headers={'X-Ollama-URL': f'http://ollama-{port}.example.com'})
+
+    assert len(admission_control._gates) <= 2
+    assert all(gate.users == 0 for gate in admission_control._gates.values())
+
+
+def test_admission_can_be_disabled(fake_ollama):
+    admission_control._buckets.clear()
+    client = create_app({'TESTING': True, 'ADMISSION_CONTROL': False}).test_client()
+    for _ in range(5):
+        response = client.post('/api/models/pull', json={'name': 'llama3'}, headers={'X-Ollama-URL': fake_ollama.url})
+        assert response.status_code == 200
+    assert not admission_control._buckets
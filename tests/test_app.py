@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+from werkzeug.serving import make_server
+
+from app import create_app
+from conftest import FakeOllama
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAIRS = 10
+
+STARTUP_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app({'TESTING': True})
+imported = time.perf_counter()
+response = app.test_client().get('/')
+first_request = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'import_seconds': imported - started,
+    'first_request_seconds': first_request - imported,
+    'modules': sorted(m for m in ('sqlalchemy', 'bs4', 'pyarrow') if m in sys.modules),
+}))
+'''
+
+
+@pytest.fixture
+def servers():
+    started = [FakeOllama({f'{name}:latest': 'FROM x\n'}, delay=0.05).start() for name in ('a', 'b')]
+    yield started
+    for server in started:
+        server.stop()
+
+
+def test_concurrent_requests_use_their_own_client(servers):
+    app = create_app({'TESTING': True})
+    # Runs after the client is built: widens the window in which another
+    # request could swap a shared client
+    app.before_request(lambda: time.sleep(0.05))
+    app_server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=app_server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{app_server.server_port}/api/models'
+    results = []
+
+    def fetch(server):
+        response = requests.get(url, headers={'X-Ollama-URL': server.url})
+        results.append((server, [m['name'] for m in response.json()['models']]))
+
+    threads = [threading.Thread(target=fetch, args=(servers[i % 2],)) for i in range(PAIRS * 2)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        app_server.shutdown()
+
+    assert len(results) == PAIRS * 2
+    for server, names in results:
+        assert names == list(server.models)
+
+
+def test_startup_benchmark(capsys):
+    """Import plus first request in a fresh interpreter; run with -s to see the timings"""
+    output = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, 'OLLAMA_SERVER_URL': 'http://127.0.0.1:9'}
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    with capsys.disabled():
+        print(f"\nimport + create_app: {result['import_seconds'] * 1000:.0f} ms, "
+              f"first request: {result['first_request_seconds'] * 1000:.0f} ms")
+    assert result['status'] == 200
+    # The database, the library scraper and pyarrow are only loaded on first use
+    assert result['modules'] == []
+    assert result['import_seconds'] < 2
+    assert result['first_request_seconds'] < 2
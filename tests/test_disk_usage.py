@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+import disk_usage
+from app import create_app
+from ollama_client import OllamaClient
+
+
+def _write_model(models_dir, name, blobs):
+    """Write a manifest for name:latest and its blobs, returning their digests"""
+    layers = []
+    for content in blobs:
+        digest = 'sha256:' + hashlib.sha256(content).hexdigest()
+        with open(os.path.join(models_dir, 'blobs', disk_usage.blob_filename(digest)), 'wb') as f:
+            f.write(content)
+        layers.append({'digest': digest, 'size': len(content)})
+
+    manifest_dir = os.path.join(models_dir, 'manifests', 'registry.ollama.ai', 'library', name)
+    os.makedirs(manifest_dir, exist_ok=True)
+    with open(os.path.join(manifest_dir, 'latest'), 'w') as f:
+        json.dump({'layers': layers}, f)
+    return [layer['digest'] for layer in layers]
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / 'blobs')
+    monkeypatch.setenv('OLLAMA_MODELS_DIR', str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def client():
+    return create_app({'TESTING': True, 'ADMISSION_CONTROL': False}).test_client()
+
+
+def test_check_blobs_only_hashes_listed_digests(models_dir, monkeypatch):
+    digests = _write_model(models_dir, 'a', [b'weights a', b'params a'])
+    hashed = []
+    real_hash_blob = disk_usage.hash_blob
+    monkeypatch.setattr(disk_usage, 'hash_blob', lambda path: hashed.append(path) or real_hash_blob(path))
+
+    result = disk_usage.check_blobs(models_dir, set(digests), verify={digests[0]})
+
+    assert result['corrupted_blobs'] == []
+    assert len(hashed) == 1
+
+
+def test_shared_layers_and_reclaimable_bytes(models_dir):
+    _write_model(models_dir, 'a', [b'shared weights', b'a only'])
+    _write_model(models_dir, 'b', [b'shared weights', b'b only!'])
+
+    result = disk_usage.analyze_usage(disk_usage.scan_models_dir(models_dir), ['a:latest'])
+
+    assert result['models']['a:latest']['shared_with'] == ['b:latest']
+    assert result['reclaimable']['reclaimable_bytes'] == len(b'a only')
+    assert result['deduplicated_bytes'] == len(b'shared weights') + len(b'a only') + len(b'b only!')
+
+
+def test_get_never_verifies(client, models_dir, monkeypatch):
+    _write_model(models_dir, 'a', [b'weights'])
+    monkeypatch.setattr(disk_usage, 'hash_blob', lambda path: pytest.fail('GET must not hash blobs'))
+
+    response = client.get('/api/models/disk-usage?verify=true')
+
+    assert response.status_code == 200
+    assert response.get_json()['corrupted_blobs'] == []
+
+
+def test_post_verify_is_limited_to_candidates(client, models_dir):
+    a = _write_model(models_dir, 'a', [b'weights a'])
+    b = _write_model(models_dir, 'b', [b'weights b'])
+    # Corrupt both blobs; only the candidate's may be reported
+    for digest in a + b:
+        with open(os.path.join(models_dir, 'blobs', disk_usage.blob_filename(digest)), 'ab') as f:
+            f.write(b'!')
+
+    response = client.post('/api/models/disk-usage', json={'candidates': ['a:latest'], 'verify': True})
+
+    assert response.status_code == 200
+    assert response.get_json()['corrupted_blobs'] == a
+
+
+def test_post_verify_requires_candidates(client, models_dir):
+    response = client.post('/api/models/disk-usage', json={'verify': True})
+
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'validation_error'
+
+
+def test_untagged_candidates_match_local_models(models_dir):
+    _write_model(models_dir, 'a', [b'weights a'])
+
+    result = OllamaClient().get_disk_usage(candidates=['a'], verify=True)
+
+    assert result['reclaimable'] == {
+        'candidates': ['a:latest'], 'unknown_models': [], 'reclaimable_bytes': len(b'weights a')
+    }
+    assert result['corrupted_blobs'] == []
+
+
+WEIGHTS = 'FROM /models/blobs/sha256-' + 'a' * 64 + '\n'
+
+
+def test_api_layers_survive_unparseable_modelfiles(fake_ollama, monkeypatch):
+    monkeypatch.delenv('OLLAMA_MODELS_DIR', raising=False)
+    fake_ollama.models.update({
+        'a:latest': WEIGHTS,
+        'b:latest': WEIGHTS,
+        'broken:latest': 'FROM x\nSYSTEM """never closed\n',
+    })
+    client = OllamaClient(base_url=fake_ollama.url)
+
+    first = client.get_disk_usage(candidates=['broken'])
+    second = client.get_disk_usage()
+
+    assert first['source'] == 'api'
+    assert first['models']['a:latest']['shared_with'] == ['b:latest']
+    assert first['models']['broken:latest'] == {
+        'total_bytes': 100, 'unique_bytes': 100, 'shared_bytes': 0, 'shared_with': []
+    }
+    assert first['reclaimable']['reclaimable_bytes'] == 100
+    assert 'error' not in second
+    # /api/show answers are cached between analyses
+    assert fake_ollama.count('POST', '/api/show') == 3
@@ -0,0 +1,126 @@
+import socket
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+import metrics
+from app import create_app
+
+RECORDS = 200000
+
+
+def _run_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_counter_folds_shards_of_exited_threads():
+    counter = metrics.Counter('test_total', 'test', ('kind',))
+    _run_threads(250, lambda: counter.inc('a'))
+    counter.inc('a', amount=2)
+
+    assert counter.collect() == {('a',): 252}
+    # Only the shard of the (still running) test thread is left
+    assert len(counter._shards) == 1
+
+
+def test_histogram_folds_shards_of_exited_threads():
+    histogram = metrics.Histogram('test_seconds', 'test', buckets=(1, 10))
+    _run_threads(100, lambda: histogram.observe(value=5))
+    histogram.observe(value=0.5)
+
+    samples = list(histogram.samples())
+
+    assert 'test_seconds_bucket{le="1"} 1' in samples
+    assert 'test_seconds_bucket{le="10"} 101' in samples
+    assert 'test_seconds_count 101' in samples
+    assert 'test_seconds_sum 500.5' in samples
+    assert len(histogram._shards) == 1
+
+
+def test_threaded_server_does_not_accumulate_shards():
+    server = make_server('127.0.0.1', 0, create_app({'TESTING': True}), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f'http://127.0.0.1:{server.server_port}/static/css/custom.css'
+        for _ in range(250):
+            requests.get(url)
+        # Let the last request thread exit before counting
+        time.sleep(0.2)
+        list(metrics.HTTP_REQUESTS.samples())
+    finally:
+        server.shutdown()
+
+    assert len(metrics.HTTP_REQUESTS._shards) < 10
+    assert len(metrics.HTTP_DURATION._shards) < 10
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _scrape(url):
+    client = create_app({'TESTING': True}).test_client()
+    started = time.perf_counter()
+    response = client.get('/metrics', headers={'X-Ollama-URL': url})
+    return response, time.perf_counter() - started
+
+
+def test_scrape_with_ollama_down_is_fast():
+    response, seconds = _scrape(f'http://127.0.0.1:{_closed_port()}')
+
+    assert response.status_code == 200
+    assert 'ollama_up 0' in response.get_data(as_text=True)
+    assert seconds < 1
+
+
+def test_scrape_with_hung_ollama_times_out_quickly():
+    # Accepts connections but never answers
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(8)
+    try:
+        response, seconds = _scrape(f'http://127.0.0.1:{listener.getsockname()[1]}')
+    finally:
+        listener.close()
+
+    assert 'ollama_up 0' in response.get_data(as_text=True)
+    assert seconds < 5
+
+
+def test_scrape_reports_running_models(fake_ollama):
+    fake_ollama.running = ['llama3:latest']
+
+    response, _seconds = _scrape(fake_ollama.url)
+
+    text = response.get_data(as_text=True)
+    assert 'ollama_up 1' in text
+    assert 'ollama_loaded_models 1' in text
+
+
+def test_recording_benchmark(capsys):
+    """Per-call cost of the lock-free recording path; run with -s to see it"""
+    counter = metrics.Counter('bench_total', 'bench', ('route', 'method', 'status'))
+    histogram = metrics.Histogram('bench_seconds', 'bench', ('route', 'method'))
+
+    started = time.perf_counter()
+    for _ in range(RECORDS):
+        counter.inc('/api/models', 'GET', '200')
+    inc_seconds = (time.perf_counter() - started) / RECORDS
+
+    started = time.perf_counter()
+    for _ in range(RECORDS):
+        histogram.observe('/api/models', 'GET', value=0.02)
+    observe_seconds = (time.perf_counter() - started) / RECORDS
+
+    with capsys.disabled():
+        print(f'\nCounter.inc: {inc_seconds * 1e6:.2f} us, Histogram.observe: {observe_seconds * 1e6:.2f} us')
+    assert inc_seconds < 20e-6
+    assert observe_seconds < 20e-6
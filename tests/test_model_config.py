@@ -0,0 +1,132 @@
+import pytest
+
+from app import create_app
+from modelfile import diff_config
+from ollama_client import OllamaClient
+
+MODELFILE = '''FROM llama3:latest
+TEMPLATE """{{ .Prompt }}
+"""
+PARAMETER temperature 0.70
+PARAMETER stop "<|eot_id|>"
+PARAMETER stop "<|end|>"
+SYSTEM "Be brief."
+'''
+
+CURRENT = {
+    'system': 'Be brief.',
+    'template': '{{ .Prompt }}\n',
+    'parameters': {'temperature': '0.70', 'stop': ['<|eot_id|>', '<|end|>']},
+}
+
+
+@pytest.fixture
+def ollama(fake_ollama):
+    fake_ollama.models['llama3:latest'] = MODELFILE
+    fake_ollama.models['qwen:latest'] = 'FROM qwen\n'
+    return fake_ollama
+
+
+@pytest.fixture
+def client(ollama):
+    test_client = create_app({'TESTING': True, 'ADMISSION_CONTROL': False}).test_client()
+    test_client.environ_base['HTTP_X_OLLAMA_URL'] = ollama.url
+    return test_client
+
+
+@pytest.mark.parametrize('request_config', [
+    {},
+    {'parameters': {'temperature': 0.7}},
+    {'parameters': {'temperature': '0.7', 'stop': ['<|eot_id|>', '<|end|>']}},
+    # The UI trims both prompts before sending them
+    {'system': 'Be brief.', 'template': '{{ .Prompt }}'},
+    {'system': '', 'template': ''},
+])
+def test_unchanged_configs_have_no_diff(request_config):
+    assert diff_config(CURRENT, **request_config) == {}
+
+
+@pytest.mark.parametrize('request_config, expected', [
+    ({'parameters': {'temperature': 0.8}}, {'parameters': {'temperature': {'old': '0.70', 'new': 0.8}}}),
+    ({'parameters': {'stop': ['<|eot_id|>']}},
+     {'parameters': {'stop': {'old': ['<|eot_id|>', '<|end|>'], 'new': ['<|eot_id|>']}}}),
+    ({'parameters': {'stop': ['<|end|>', '<|eot_id|>']}},
+     {'parameters': {'stop': {'old': ['<|eot_id|>', '<|end|>'], 'new': ['<|end|>', '<|eot_id|>']}}}),
+    ({'parameters': {'num_ctx': 4096}}, {'parameters': {'num_ctx': {'old': None, 'new': 4096}}}),
+    ({'system': 'Be verbose.'}, {'system': {'old': 'Be brief.', 'new': 'Be verbose.'}}),
+])
+def test_changed_configs_are_reported(request_config, expected):
+    assert diff_config(CURRENT, **request_config) == expected
+
+
+def test_noop_save_skips_create(client, ollama):
+    response = client.post('/api/models/llama3:latest/config', json={
+        'system': 'Be brief.',
+        'template': '{{ .Prompt }}',
+        'parameters': {'temperature': '0.7', 'stop': ['<|eot_id|>', '<|end|>']},
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['changed'] is False
+    assert ollama.count('POST', '/api/create') == 0
+
+
+def test_save_only_rewrites_changed_fields(client, ollama):
+    response = client.post('/api/models/llama3:latest/config', json={
+        'system': 'Be brief.',
+        'template': '{{ .Prompt }}',
+        'parameters': {'temperature': '0.7', 'num_ctx': '4096'},
+    })
+
+    assert response.get_json()['diff'] == {'parameters': {'num_ctx': {'old': None, 'new': '4096'}}}
+    assert ollama.count('POST', '/api/create') == 1
+    # The trailing newline of the template and the 0.70 spelling are kept
+    assert ollama.created['llama3:latest'] == MODELFILE + 'PARAMETER num_ctx 4096\n'
+
+
+def test_config_is_cached_per_digest(ollama):
+    client = OllamaClient(base_url=ollama.url)
+
+    for _ in range(3):
+        assert client.save_model_config('llama3:latest', parameters={'temperature': 0.7})['changed'] is False
+
+    assert ollama.count('POST', '/api/show') == 1
+    assert ollama.count('GET', '/api/tags') == 3
+
+
+def test_batch_save_reports_each_model(client, ollama):
+    response = client.post('/api/models/config/batch', json={'models': [
+        {'name': 'llama3:latest', 'parameters': {'temperature': 0.7}},
+        {'name': 'qwen:latest', 'parameters': {'temperature': 0.2}},
+        {'parameters': {'temperature': 0.2}},
+    ]})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [(r['name'], r['success'], r.get('changed')) for r in body['results']] == [
+        ('llama3:latest', True, False),
+        ('qwen:latest', True, True),
+        (None, False, None),
+    ]
+    assert (body['changed'], body['unchanged'], body['failed']) == (1, 1, 1)
+    assert list(ollama.created) == ['qwen:latest']
+    # The model list is fetched once for the whole batch
+    assert ollama.count('GET', '/api/tags') == 1
+
+
+def test_batch_save_rejects_malformed_entries(client, ollama):
+    response = client.post('/api/models/config/batch', json={'models': ['llama3', None, {'system': 'x'}]})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [(r['name'], r['success']) for r in body['results']] == [(None, False)] * 3
+    assert body['failed'] == 3
+    assert ollama.count('POST', '/api/create') == 0
+
+
+@pytest.mark.parametrize('payload', [{}, {'models': []}, {'models': 'llama3'}, ['llama3']])
+def test_batch_save_requires_a_model_list(client, payload):
+    response = client.post('/api/models/config/batch', json=payload)
+
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'validation_error'
@@ -0,0 +1,99 @@
+import pytest
+
+import ollama_client
+from app import create_app
+from ollama_client import OllamaClient, normalize_model_name
+from translations import gettext
+
+
+@pytest.fixture
+def ollama(fake_ollama):
+    fake_ollama.models.update({
+        'llama3:latest': 'FROM llama3\nPARAMETER num_ctx 8192\n',
+        'mistral:7b': 'FROM mistral\n',
+    })
+    return fake_ollama
+
+
+@pytest.fixture
+def client():
+    return create_app({'TESTING': True, 'ADMISSION_CONTROL': False}).test_client()
+
+
+def _details(client, url, names, language='en'):
+    response = client.post(f'/api/models/details?language={language}',
+                           json={'models': names}, headers={'X-Ollama-URL': url})
+    assert response.status_code == 200
+    return {m['name']: m for m in response.get_json()['models']}
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('llama3', 'llama3:latest'),
+    ('llama3:8b', 'llama3:8b'),
+    ('hf.co/user/repo', 'hf.co/user/repo:latest'),
+    ('localhost:5000/team/model', 'localhost:5000/team/model:latest'),
+])
+def test_normalize_model_name(name, expected):
+    assert normalize_model_name(name) == expected
+
+
+def test_details_are_fetched_once_and_cached(client, ollama):
+    first = _details(client, ollama.url, ['llama3:latest', 'mistral:7b'])
+    _details(client, ollama.url, ['llama3:latest', 'mistral:7b'])
+
+    assert first['llama3:latest']['num_ctx'] == '8192'
+    assert ollama.count('POST', '/api/show', 'llama3:latest') == 1
+    assert ollama.count('POST', '/api/show', 'mistral:7b') == 1
+
+
+def test_untagged_invalidation_drops_the_latest_entry(ollama):
+    client = OllamaClient(base_url=ollama.url)
+    client._show_model('llama3:latest')
+
+    # The pull route invalidates with the name as typed by the user
+    client.invalidate_model('llama3')
+    client._show_model('llama3:latest')
+
+    assert ollama.count('POST', '/api/show', 'llama3:latest') == 2
+
+
+def test_show_cache_is_bounded(ollama, monkeypatch):
+    monkeypatch.setattr(ollama_client, 'SHOW_CACHE_SIZE', 3)
+    for index in range(5):
+        ollama.models[f'm{index}:latest'] = 'FROM m\n'
+    client = OllamaClient(base_url=ollama.url)
+
+    for index in range(5):
+        client._show_model(f'm{index}:latest')
+
+    assert list(key[1] for key in ollama_client._show_cache) == ['m2:latest', 'm3:latest', 'm4:latest']
+
+
+def test_expired_entries_are_refetched(ollama, monkeypatch):
+    monkeypatch.setattr(ollama_client, 'SHOW_CACHE_TTL', -1)
+    client = OllamaClient(base_url=ollama.url)
+
+    client._show_model('mistral:7b')
+    client._show_model('mistral:7b')
+
+    assert ollama.count('POST', '/api/show', 'mistral:7b') == 2
+    assert len(ollama_client._show_cache) == 1
+
+
+@pytest.mark.parametrize('language', ['en', 'fr'])
+def test_worker_errors_use_the_request_locale(client, ollama, monkeypatch, language):
+    monkeypatch.setattr(OllamaClient, '_show_model',
+                        lambda self, name: {'error': gettext('Unable to connect to Ollama server')})
+
+    models = _details(client, ollama.url, ['llama3:latest'], language)
+
+    expected = {'en': 'Unable to connect to Ollama server', 'fr': 'Impossible de se connecter au serveur Ollama'}
+    assert models['llama3:latest']['error'] == expected[language]
+
+
+def test_details_reuse_the_module_pool(client, ollama, monkeypatch):
+    def fail(*args, **kwargs):
+        pytest.fail('get_models_details must not create a thread pool per call')
+    monkeypatch.setattr(ollama_client, 'ThreadPoolExecutor', fail)
+
+    assert set(_details(client, ollama.url, ['llama3:latest', 'mistral:7b'])) == {'llama3:latest', 'mistral:7b'}
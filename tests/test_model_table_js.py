@@ -0,0 +1,17 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'js', 'model_table.bench.js')
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_model_table_benchmark(capsys):
+    """Runs the front end table checks, timed only when jsdom is installed"""
+    result = subprocess.run(['node', BENCHMARK], capture_output=True, text=True)
+
+    with capsys.disabled():
+        print('\n' + result.stdout.strip())
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,243 @@
+import gc
+import os
+import random
+import time
+
+import pytest
+
+import modelfile
+from modelfile import HEREDOC, Modelfile, ModelfileError, parse, quote_value
+from ollama_client import OllamaClient
+
+SAMPLE = '''# Modelfile generated by "ollama show"
+# To build a new Modelfile based on this, replace FROM with:
+# FROM llama3:latest
+
+FROM /root/.ollama/models/blobs/sha256-6a0746a1ec1aef3e7ec53868f220ff6e389f6f8ef87a01d77c96807de94ca2aa
+TEMPLATE """{{ if .System }}<|start_header_id|>system<|end_header_id|>
+
+{{ .System }}<|eot_id|>{{ end }}"""
+PARAMETER num_keep 24
+PARAMETER stop "<|start_header_id|>"
+PARAMETER stop "<|end_header_id|>"
+PARAMETER   temperature   0.7
+SYSTEM "You are \\"helpful\\"."
+MESSAGE user Hello
+LICENSE """META LLAMA 3 COMMUNITY LICENSE AGREEMENT
+"""
+'''
+
+VALUES = ['0.7', 'llama3', 'two words', '', ' leading', 'trailing ', 'a "quote"', 'ends with "',
+          'back\\slash', '# not a comment', 'line one\nline two', 'has """ heredoc', '"""\n"',
+          'tab\tinside', 'crlf\r\nline', '\\"', 'ünïcödé', '{{ .Prompt }}']
+
+
+def _random_value(rng):
+    alphabet = 'ab c"\\#\n\t{}\r'
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+
+def _random_modelfile(rng):
+    """Random but valid Modelfile text with varied spacing, case, quoting and comments"""
+    lines = []
+    for _ in range(rng.randint(0, 12)):
+        if rng.random() < 0.2:
+            lines.append(rng.choice(['', '# comment', '   ', '  # indented "comment"']) + rng.choice(['\n', '\r\n']))
+            continue
+        command = rng.choice(['FROM', 'from', 'Parameter', 'PARAMETER', 'SYSTEM', 'TEMPLATE', 'MESSAGE', 'LICENSE'])
+        head = command + rng.choice([' ', '  ', '\t'])
+        if command.upper() in ('PARAMETER', 'MESSAGE'):
+            head += rng.choice(['stop', 'temperature', 'user', 'assistant']) + rng.choice([' ', '   '])
+        value = _random_value(rng)
+        preferred = rng.choice([None, '', '"', HEREDOC])
+        lines.append(head + quote_value(value, preferred, command.upper()) + rng.choice(['\n', '\r\n', '  \n']))
+    text = ''.join(lines)
+    if rng.random() < 0.3:
+        text += rng.choice(['# trailing comment', '\n\n', '# no newline'])
+    return text
+
+
+def test_sample_round_trip():
+    parsed = parse(SAMPLE)
+
+    assert parsed.serialize() == SAMPLE
+    assert parsed.parameters == {
+        'num_keep': '24',
+        'stop': ['<|start_header_id|>', '<|end_header_id|>'],
+        'temperature': '0.7',
+    }
+    assert parsed.get('SYSTEM') == 'You are "helpful".'
+    assert parsed.messages == [{'role': 'user', 'content': 'Hello'}]
+
+
+def test_random_round_trip():
+    rng = random.Random(20261019)
+    for _ in range(2000):
+        text = _random_modelfile(rng)
+        assert parse(text).serialize() == text, text
+
+
+@pytest.mark.parametrize('value', VALUES)
+@pytest.mark.parametrize('preferred', [None, '', '"', HEREDOC])
+@pytest.mark.parametrize('command', ['SYSTEM', 'PARAMETER'])
+def test_quote_value_reads_back(value, preferred, command):
+    name = ' stop' if command == 'PARAMETER' else ''
+    text = f'{command}{name} {quote_value(value, preferred, command)}\n'
+    instruction = parse(text).instructions[0]
+
+    assert instruction.value == value
+
+
+def test_random_values_read_back():
+    rng = random.Random(7)
+    for _ in range(2000):
+        value = _random_value(rng)
+        text = f'SYSTEM {quote_value(value, rng.choice([None, "", chr(34), HEREDOC]), "SYSTEM")}\n'
+        assert parse(text).get('SYSTEM') == value, repr(value)
+
+
+def test_edits_keep_untouched_text():
+    parsed = parse(SAMPLE)
+    parsed.set_parameter('temperature', 0.2)
+    parsed.set_parameter('stop', ['<|eot_id|>'])
+    parsed.set('SYSTEM', 'Be brief.')
+
+    text = parsed.serialize()
+
+    assert text.startswith(SAMPLE.split('PARAMETER num_keep')[0])
+    # Edited instructions keep their original quoting style
+    assert 'PARAMETER num_keep 24\nPARAMETER stop "<|eot_id|>"\nPARAMETER temperature 0.2\n' in text
+    assert 'SYSTEM "Be brief."\n' in text
+    assert parse(text).parameters['stop'] == '<|eot_id|>'
+
+
+@pytest.mark.parametrize('text', [
+    'FROM llama3\nSYSTEM """never closed\n',
+    'FROM llama3\nSYSTEM "never closed\n',
+    'FROM llama3\nPARAMETER\n',
+])
+def test_invalid_modelfiles_raise(text):
+    with pytest.raises(ModelfileError):
+        parse(text)
+
+
+def test_unknown_instructions_round_trip():
+    text = SAMPLE.replace('PARAMETER num_keep', 'RENDERER qwen3-coder\nParser  "qwen3"\nPARAMETER num_keep')
+    parsed = parse(text)
+    parsed.set_parameter('temperature', 0.2)
+
+    assert parse(text).serialize() == text
+    assert [i.value for i in parsed.find('RENDERER') + parsed.find('PARSER')] == ['qwen3-coder', 'qwen3']
+    assert 'RENDERER qwen3-coder\nParser  "qwen3"\n' in parsed.serialize()
+
+
+@pytest.mark.parametrize('text', ['FORM llama3\n', 'FROM llama3\nPARAMETR temperature 0.5\n'])
+def test_strict_parse_rejects_unknown_instructions(text):
+    parse(text)
+    with pytest.raises(ModelfileError):
+        parse(text, strict=True)
+
+
+def test_unknown_instruction_reports_its_line():
+    with pytest.raises(ModelfileError) as error:
+        parse('FROM llama3\n# comment\nPARAMETR temperature 0.5\n', strict=True)
+    assert error.value.line == 3
+
+
+class _RecordingPattern:
+    """Wraps a compiled pattern and records the position of every match call"""
+
+    def __init__(self, pattern, calls):
+        self.pattern = pattern
+        self.calls = calls
+
+    def match(self, text, pos=0):
+        self.calls.append(pos)
+        return self.pattern.match(text, pos)
+
+
+LINEAR_UNITS = [
+    'PARAMETER stop "<|eot_id|>"\n',
+    '# comment line\n',
+    'SYSTEM """' + 'x' * 1000 + '\n' * 20 + '"""\n',
+    'RENDERER qwen3\r\n',
+]
+
+
+@pytest.mark.parametrize('unit', LINEAR_UNITS)
+def test_parse_only_moves_forward(unit, monkeypatch):
+    """Every match starts at or after the previous one, a bounded number per instruction"""
+    calls = []
+    for name in ('_TRIVIA_RE', '_LAST_LINE_TRIVIA_RE', '_COMMAND_RE', '_NAME_RE', '_QUOTED_RE', '_BARE_RE',
+                 '_LINE_END_RE'):
+        monkeypatch.setattr(modelfile, name, _RecordingPattern(getattr(modelfile, name), calls))
+    text = 'FROM llama3\n' + unit * 200
+
+    parsed = parse(text)
+
+    assert parsed.serialize() == text
+    assert calls == sorted(calls)
+    assert len(calls) <= 6 * (len(parsed.instructions) + 1)
+
+
+def _parse_seconds(text, runs=5):
+    """Best of several runs, without collector pauses skewing a single one"""
+    gc.disable()
+    try:
+        best = None
+        for _ in range(runs):
+            started = time.perf_counter()
+            Modelfile.parse(text).serialize()
+            seconds = time.perf_counter() - started
+            best = seconds if best is None else min(best, seconds)
+        return best
+    finally:
+        gc.enable()
+
+
+@pytest.mark.skipif(not os.environ.get('RUN_BENCHMARKS'), reason='set RUN_BENCHMARKS=1 to run timing benchmarks')
+@pytest.mark.parametrize('unit', LINEAR_UNITS)
+def test_parse_time_benchmark(unit, capsys):
+    """Parse time of 2 MB and 16 MB inputs; run with RUN_BENCHMARKS=1 -s to see it"""
+    # Start above cache sizes, where a small input parses unrepresentatively fast
+    small = unit * (2 * 1024 * 1024 // len(unit))
+    large = small * 8
+
+    small_seconds = _parse_seconds(small)
+    large_seconds = _parse_seconds(large, runs=3)
+
+    with capsys.disabled():
+        print(f'\n{unit[:12]!r}: 2 MB {small_seconds * 1000:.0f} ms, 16 MB {large_seconds * 1000:.0f} ms')
+    # 8x the input should take about 8x the time; quadratic parsing would take 64x
+    assert large_seconds < small_seconds * 20
+
+
+def test_save_edits_the_current_modelfile(fake_ollama):
+    fake_ollama.models['llama3:latest'] = SAMPLE
+    client = OllamaClient(base_url=fake_ollama.url)
+
+    result = client.save_model_config('llama3:latest', parameters={'temperature': 0.2, 'num_keep': 24})
+
+    assert result['success'] and result['changed']
+    assert result['diff'] == {'parameters': {'temperature': {'old': '0.7', 'new': 0.2}}}
+    sent = fake_ollama.created['llama3:latest']
+    assert sent.startswith('# Modelfile generated by "ollama show"\n')
+    assert 'FROM llama3:latest\n' in sent
+    assert 'PARAMETER num_keep 24\n' in sent
+    assert 'PARAMETER temperature 0.2\n' in sent
+    assert 'SYSTEM "You are \\"helpful\\"."\n' in sent
+    assert 'sha256-' not in sent
+
+
+def test_newer_instructions_do_not_break_the_client(fake_ollama):
+    fake_ollama.models['qwen3:latest'] = SAMPLE.replace('TEMPLATE', 'RENDERER qwen3\nPARSER qwen3\nTEMPLATE')
+    client = OllamaClient(base_url=fake_ollama.url)
+
+    config = client.get_model_config('qwen3:latest')
+    saved = client.save_model_config('qwen3:latest', parameters={'temperature': 0.2})
+    usage = client.get_disk_usage()
+
+    assert config['parameters']['temperature'] == '0.7'
+    assert saved['success'] and saved['changed']
+    assert 'RENDERER qwen3\nPARSER qwen3\n' in fake_ollama.created['qwen3:latest']
+    assert 'error' not in usage
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from ollama_client import OllamaClient
+from singleflight import SingleFlight
+
+CALLERS = 10
+
+
+def _concurrently(count, target):
+    """Run target(index) on count threads released together; returns results by index"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(index):
+        barrier.wait()
+        try:
+            results[index] = target(index)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _slow(calls, result=None, error=None):
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        if error is not None:
+            raise error
+        return result
+    return fn
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    results = _concurrently(CALLERS, lambda i: flight.do('key', _slow(calls, {'models': []})))
+
+    assert len(calls) == 1
+    assert results == [{'models': []}] * CALLERS
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    calls = []
+
+    _concurrently(4, lambda i: flight.do(i % 2, _slow(calls, i)))
+
+    assert len(calls) == 2
+
+
+def test_waiters_reraise_the_leader_error():
+    flight = SingleFlight()
+    calls = []
+    error = ConnectionError('down')
+
+    results = _concurrently(CALLERS, lambda i: flight.do('key', _slow(calls, error=error)))
+
+    assert len(calls) == 1
+    assert all(result is error for result in results)
+
+
+def test_callers_get_isolated_copies():
+    flight = SingleFlight()
+    calls = []
+
+    def mutate(index):
+        result = flight.do('key', _slow(calls, {'models': [{'name': 'a'}]}))
+        result['models'].append(index)
+        return result
+
+    results = _concurrently(CALLERS, mutate)
+
+    assert len(calls) == 1
+    assert sorted(r['models'][1] for r in results) == list(range(CALLERS))
+    assert all(len(r['models']) == 2 for r in results)
+
+
+def test_results_are_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    flight.do('key', _slow(calls, 1))
+    flight.do('key', _slow(calls, 2))
+
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def slow_ollama(fake_ollama):
+    fake_ollama.models.update({'a:latest': 'FROM a\n', 'b:latest': 'FROM b\n'})
+    fake_ollama.delay = 0.2
+    return fake_ollama
+
+
+def test_concurrent_list_models_make_one_upstream_request(slow_ollama):
+    results = _concurrently(CALLERS, lambda i: OllamaClient(base_url=slow_ollama.url).list_models())
+
+    assert all(not isinstance(r, Exception) and len(r['models']) == 2 for r in results)
+    assert slow_ollama.count('GET', '/api/tags') == 1
+    assert slow_ollama.count('POST', '/api/show', 'a:latest') == 1
+    assert slow_ollama.count('POST', '/api/show', 'b:latest') == 1
+
+
+def test_writes_are_never_coalesced(slow_ollama):
+    _concurrently(4, lambda i: OllamaClient(base_url=slow_ollama.url).delete_model('a:latest'))
+
+    assert slow_ollama.count('DELETE', '/api/delete') == 4
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+import translations
+from app import create_app, index_cache
+
+RENDERS = 50
+
+
+@pytest.fixture
+def app():
+    index_cache.clear()
+    yield create_app({'TESTING': True, 'CACHE_INDEX': False})
+    index_cache.clear()
+
+
+def _render_index(client, language):
+    response = client.get(f'/?language={language}')
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_index_is_translated_per_locale(app):
+    client = app.test_client()
+
+    assert 'Filtrer les modèles' in _render_index(client, 'fr')
+    assert 'Filter models' in _render_index(client, 'en')
+
+
+def test_gettext_variables_are_applied_after_lookup(app):
+    with app.test_request_context('/?language=fr'):
+        assert translations.gettext('No changes to save for %(model)s', model='llama3') == \
+            'Aucune modification à enregistrer pour llama3'
+
+
+def test_locale_is_resolved_once_per_request(app, monkeypatch):
+    with app.test_request_context('/?language=en'):
+        assert translations.get_locale() == 'en'
+        monkeypatch.setattr(translations, 'request', None)
+        assert translations.get_locale() == 'en'
+
+
+def test_renders_never_reload_catalogs(app, monkeypatch):
+    def fail(*args, **kwargs):
+        pytest.fail('catalogs must be loaded once at import, not per render')
+    monkeypatch.setattr(translations._gettext, 'GNUTranslations', fail)
+    monkeypatch.setattr(translations._gettext, 'translation', fail)
+
+    client = app.test_client()
+    for language in translations.get_available_languages():
+        _render_index(client, language)
+
+
+@pytest.mark.parametrize('language', ['en', 'fr'])
+def test_index_render_benchmark(app, language, capsys):
+    """Uncached index renders per locale; run with -s to see the timings"""
+    client = app.test_client()
+    _render_index(client, language)
+
+    started = time.perf_counter()
+    for _ in range(RENDERS):
+        _render_index(client, language)
+    per_render = (time.perf_counter() - started) / RENDERS
+
+    with capsys.disabled():
+        print(f'\nindex.html [{language}] uncached render: {per_render * 1000:.2f} ms')
+    # Generous bound: a regression to per-call catalog loading costs far more
+    assert per_render < 0.05
+
+
+def test_cached_index_benchmark(capsys):
+    """The cached index skips rendering and answers conditional requests with 304"""
+    index_cache.clear()
+    client = create_app({'TESTING': True, 'CACHE_INDEX': True}).test_client()
+    etag = client.get('/?language=fr').headers['ETag']
+
+    started = time.perf_counter()
+    for _ in range(RENDERS):
+        assert client.get('/?language=fr', headers={'If-None-Match': etag}).status_code == 304
+    per_request = (time.perf_counter() - started) / RENDERS
+    index_cache.clear()
+
+    with capsys.disabled():
+        print(f'\nindex.html [fr] cached 304: {per_request * 1000:.2f} ms')
+    assert per_request < 0.05
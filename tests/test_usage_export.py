@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import sqlite3
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+import usage_export
+from app import create_app
+from models import ModelUsage
+
+ROWS = 20000
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def stats_db(tmp_path, monkeypatch):
+    """Point the lazily created engine at a fresh SQLite file for one test"""
+    path = tmp_path / 'usage.db'
+    monkeypatch.setenv('STATS_DATABASE_URL', f'sqlite:///{path}')
+    previous = models._engine
+    models._engine = None
+    models.get_engine()
+    yield str(path)
+    models._engine.dispose()
+    models._engine = previous
+    if previous is not None:
+        models.Session.configure(bind=previous)
+
+
+def _fill(path, count, first=0):
+    """Insert synthetic rows with plain sqlite3, far faster than the ORM"""
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        'INSERT INTO model_usage (model_name, operation, prompt_tokens, completion_tokens, total_duration, timestamp)'
+        ' VALUES (?, ?, ?, ?, ?, ?)',
+        (
+            (f'model-{i % 5}', ('chat', 'generate')[i % 2], i % 100, None if i % 7 == 0 else i % 50, 0.5,
+             (START + timedelta(seconds=i * 10)).isoformat(' '))
+            for i in range(first, first + count)
+        )
+    )
+    connection.commit()
+    connection.close()
+
+
+def _export_peak(fmt, **filters):
+    """Drain an export, returning (bytes written, peak traced memory)"""
+    columns = ModelUsage.export_columns(filters.get('rollup'))
+    tracemalloc.start()
+    try:
+        total = 0
+        for chunk in usage_export.export_chunks(fmt, columns, ModelUsage.iter_usage(**filters)):
+            total += len(chunk)
+        return total, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('fmt', [
+    'csv',
+    'ndjson',
+    pytest.param('parquet', marks=pytest.mark.skipif(usage_export.pyarrow is None, reason='pyarrow is not installed')),
+])
+def test_export_memory_is_flat(stats_db, fmt):
+    _fill(stats_db, ROWS)
+    small_bytes, small_peak = _export_peak(fmt)
+    _fill(stats_db, ROWS * 9, first=ROWS)
+    large_bytes, large_peak = _export_peak(fmt)
+
+    print(f'\n{fmt}: {ROWS} rows peak {small_peak / 1e6:.1f} MB, {ROWS * 10} rows peak {large_peak / 1e6:.1f} MB')
+    assert large_bytes > small_bytes * 5
+    # Ten times the rows, same memory: only one batch is ever held
+    assert large_peak < small_peak * 1.5
+
+
+def test_export_filters_and_rows(stats_db):
+    _fill(stats_db, 100)
+    columns = ModelUsage.export_columns()
+
+    text = ''.join(usage_export.export_chunks('csv', columns, ModelUsage.iter_usage(
+        model_names=['model-1'], operations=['generate'],
+        since=START + timedelta(seconds=100), until=START + timedelta(seconds=500))))
+    rows = list(csv.DictReader(io.StringIO(text)))
+
+    assert [row['id'] for row in rows] == ['12', '22', '32', '42']
+    assert rows[0]['timestamp'] == '2026-01-01T00:01:50'
+    assert rows[0]['completion_tokens'] == '11'
+
+
+def test_rollup_sums_per_period(stats_db):
+    # 100 rows, 10 s apart: all in the first hour
+    _fill(stats_db, 100)
+    columns = ModelUsage.export_columns('hour')
+
+    lines = ''.join(usage_export.export_chunks('ndjson', columns, ModelUsage.iter_usage(rollup='hour')))
+    rows = [json.loads(line) for line in lines.splitlines()]
+
+    assert len(rows) == 10  # 5 models x 2 operations
+    assert {row['period'] for row in rows} == {'2026-01-01T00:00:00'}
+    assert sum(row['operations'] for row in rows) == 100
+    assert sum(row['prompt_tokens'] for row in rows) == sum(i % 100 for i in range(100))
+
+
+def test_export_endpoint(stats_db):
+    _fill(stats_db, 10)
+    client = create_app({'TESTING': True}).test_client()
+
+    response = client.get('/api/models/stats/export?format=ndjson&model=model-0')
+    invalid = client.get('/api/models/stats/export?since=yesterday')
+    unknown = client.get('/api/models/stats/export?format=xml')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename="ollama-usage.ndjson"'
+    assert [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()] == [1, 6]
+    assert invalid.status_code == 400
+    assert unknown.status_code == 400
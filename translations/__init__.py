@@ -1,6 +1,19 @@
-"""Translation manager for the Ollama Manager UI"""
+"""Translation manager for the Ollama Manager UI
+
+Both translation sources are loaded once at import time:
+- the key based dictionaries in en.py / fr.py, used by t()
+- the compiled gettext catalogs (translations/<lang>/LC_MESSAGES/messages.mo),
+  used by gettext() in templates and in OllamaClient
+
+The locale is resolved once per request and kept on flask.g. Worker
+threads serving a request have no request context; they run under
+force_locale() with the locale of the request they work for.
+"""
+import gettext as _gettext
 import os
-from flask import request, session
+import threading
+from contextlib import contextmanager
+from flask import g, has_request_context, request, session
 
 # Import language files
 from .en import translations as en_translations
@@ -12,13 +25,66 @@ TRANSLATIONS = {
 }
 
 DEFAULT_LANGUAGE = 'fr'
+CATALOG_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_DOMAIN = 'messages'
+
+
+def _load_catalogs():
+    """Load every compiled .mo catalog; source strings are English"""
+    catalogs = {'en': _gettext.NullTranslations()}
+    for lang in TRANSLATIONS:
+        path = os.path.join(CATALOG_DIR, lang, 'LC_MESSAGES', f'{CATALOG_DOMAIN}.mo')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                catalogs[lang] = _gettext.GNUTranslations(f)
+    return catalogs
+
+
+CATALOGS = _load_catalogs()
+
+# Key lookups with the default language already merged in as fallback
+_RESOLVED = {
+    lang: {**TRANSLATIONS[DEFAULT_LANGUAGE], **strings}
+    for lang, strings in TRANSLATIONS.items()
+}
+
+
+# Locale set by force_locale() for threads working outside a request
+_forced = threading.local()
+
+
+@contextmanager
+def force_locale(lang):
+    """Translate with lang in code running outside the request, e.g. a thread pool"""
+    previous = getattr(_forced, 'language', None)
+    _forced.language = lang
+    try:
+        yield
+    finally:
+        _forced.language = previous
+
+
+def get_locale():
+    """Get the language of the current request, resolving it only once"""
+    if not has_request_context():
+        return getattr(_forced, 'language', None) or DEFAULT_LANGUAGE
+
+    lang = getattr(g, 'language', None)
+    if lang is None:
+        requested = request.args.get('language')
+        if requested in TRANSLATIONS:
+            session['language'] = requested
+        lang = session.get('language', DEFAULT_LANGUAGE)
+        if lang not in TRANSLATIONS:
+            lang = DEFAULT_LANGUAGE
+        g.language = lang
+    return lang
+
 
 def get_translation(key, **kwargs):
     """Get translated text for the given key in the current language"""
-    current_lang = session.get('language', DEFAULT_LANGUAGE)
-    translations = TRANSLATIONS.get(current_lang, TRANSLATIONS[DEFAULT_LANGUAGE])
-    text = translations.get(key, TRANSLATIONS[DEFAULT_LANGUAGE].get(key, key))
-    
+    text = _RESOLVED[get_locale()].get(key, key)
+
     # Apply any format parameters
     if kwargs:
         try:
@@ -26,20 +92,37 @@ def get_translation(key, **kwargs):
         except KeyError:
             # If formatting fails, return the unformatted text
             pass
-    
+
     return text
 
+
+def gettext(message, **variables):
+    """Look up a catalog message, then apply %(name)s variables to the result"""
+    text = CATALOGS.get(get_locale(), CATALOGS['en']).gettext(message)
+    return text % variables if variables else text
+
+
+def ngettext(singular, plural, num, **variables):
+    """Plural aware gettext; num is available to the message as %(num)s"""
+    variables.setdefault('num', num)
+    text = CATALOGS.get(get_locale(), CATALOGS['en']).ngettext(singular, plural, num)
+    return text % variables
+
+
 def get_available_languages():
     """Get list of available languages"""
     return list(TRANSLATIONS.keys())
 
+
 def set_language(lang):
     """Set the current language"""
     if lang in TRANSLATIONS:
         session['language'] = lang
+        g.language = lang
         return True
     return False
 
+
 # Jinja2 template function
 def t(key, **kwargs):
     """Template function for translations"""
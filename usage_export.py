@@ -0,0 +1,132 @@
+"""Stream model usage rows as CSV, NDJSON, Arrow or Parquet
+
+Every writer takes the column names and an iterator of row tuples and
+yields encoded chunks, one per batch of rows, so an export is never held
+in memory as a whole.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional, CSV and NDJSON are always available
+    pyarrow = None
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+COLUMNAR_FORMATS = ('arrow', 'parquet')
+CHUNK_ROWS = 10000
+
+
+def available_formats():
+    return [name for name in FORMATS if pyarrow is not None or name not in COLUMNAR_FORMATS]
+
+
+def _batches(rows, size=CHUNK_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batches(rows):
+        writer.writerows([_plain(v) for v in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only, the export matched no rows
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(columns, rows):
+    for batch in _batches(rows):
+        yield ''.join(
+            json.dumps(dict(zip(columns, (_plain(v) for v in row)))) + '\n'
+            for row in batch
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what pyarrow writes until it is drained"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(columns):
+    types = {
+        'id': pyarrow.int64(),
+        'timestamp': pyarrow.timestamp('us'),
+        'period': pyarrow.timestamp('us'),
+        'operations': pyarrow.int64(),
+        'prompt_tokens': pyarrow.int64(),
+        'completion_tokens': pyarrow.int64(),
+        'total_duration': pyarrow.float64(),
+    }
+    return pyarrow.schema([(name, types.get(name, pyarrow.string())) for name in columns])
+
+
+def columnar_chunks(columns, rows, fmt):
+    """Arrow IPC stream or Parquet, one record batch / row group per chunk"""
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    try:
+        for batch in _batches(rows):
+            data = {name: list(values) for name, values in zip(columns, zip(*batch))}
+            writer.write_table(pyarrow.Table.from_pydict(data, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_chunks(fmt, columns, rows):
+    if fmt == 'csv':
+        return csv_chunks(columns, rows)
+    if fmt == 'ndjson':
+        return ndjson_chunks(columns, rows)
+    return columnar_chunks(columns, rows, fmt)